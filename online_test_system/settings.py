@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.utils.translation import gettext_lazy as _
 
@@ -44,6 +45,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Statik fayllar sessiya va tildan oldin (test_app/middleware.py)
+    "test_app.middleware.PrecompressedStaticMiddleware",
+    # Katalog versiyalari so'rov boshida bir marta (test_app/catalog.py)
+    "test_app.middleware.CatalogVersionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -71,18 +76,78 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "online_test_system.wsgi.application"
+ASGI_APPLICATION = "online_test_system.asgi.application"
+
+# ASGI (uvicorn/daphne) bilan ishga tushirilganda imtihon ko'rinishlarining
+# async versiyalarini yoqish: ASYNC_EXAM_VIEWS=1
+ASYNC_EXAM_VIEWS = os.environ.get("ASYNC_EXAM_VIEWS", "0") == "1"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite production profili: WAL (o'quvchilar yozuvchini kutmaydi), yozuv
+# tranzaksiyalari BEGIN IMMEDIATE bilan ochiladi va busy timeout ichida
+# navbat kutadi. Lock baribir chiqsa test_app.dblocks.retry_on_lock
+# tranzaksiyani qayta ishga tushiradi.
+# WAL bazaning o'zida saqlanadi va migratsiya bilan bir marta yoqiladi
+# (test_app/migrations/0017_sqlite_wal.py); init_command da faqat har
+# ulanishga tegishli sozlamalar.
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "timeout": 10,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA mmap_size=134217728;"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA cache_size=-16000;"
+            ),
+        },
     }
 }
 
+# PostgreSQL: DB_ENGINE=postgresql va POSTGRES_* o'zgaruvchilari bilan yoqiladi
+# (pip install -r requirements-postgres.txt). Standart holatda ulanishlar
+# psycopg pool orqali qayta ishlatiladi; POSTGRES_POOL=0 bo'lsa doimiy
+# ulanishlar (CONN_MAX_AGE). PgBouncer transaction pooling orqasida
+# POSTGRES_PGBOUNCER=1 - u server-side cursorlarni qo'llab-quvvatlamaydi.
+
+if os.environ.get("DB_ENGINE") == "postgresql":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "online_test"),
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("POSTGRES_PGBOUNCER") == "1",
+        "OPTIONS": {},
+    }
+    if os.environ.get("POSTGRES_POOL", "1") == "1":
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("POSTGRES_POOL_MIN", "2")),
+            "max_size": int(os.environ.get("POSTGRES_POOL_MAX", "20")),
+            "timeout": 10,
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = 60
+        DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Katta eksport va ro'yxatlar .iterator() bilan shu o'lchamdagi bo'laklarda
+# o'qiladi (PostgreSQL da server-side cursor)
+DB_ITERATOR_CHUNK_SIZE = 2000
+
+# "database is locked" bo'lganda qayta urinishlar soni va boshlang'ich kechikish
+DB_LOCK_RETRIES = 3
+DB_LOCK_RETRY_BACKOFF = 0.05
+# BEGIN IMMEDIATE shundan uzoq kutsa lock kutishi sifatida hisoblanadi (soniya)
+DB_LOCK_WAIT_THRESHOLD = 0.05
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +189,49 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Media va statik fayllarni Django yuborishi (test_app/serving.py, statik -
+# test_app/middleware.py). Oldida nginx/Apache fayllarni o'zi bersa
+# SERVE_FILES=0.
+SERVE_FILES = os.environ.get("SERVE_FILES", "1") == "1"
+# "" - Django o'zi (sendfile), "x-accel-redirect" (nginx), "x-sendfile"
+FILE_OFFLOAD = os.environ.get("FILE_OFFLOAD", "")
+# nginx internal location prefiksi: <prefiks>media/... va <prefiks>static/...
+FILE_OFFLOAD_PREFIX = os.environ.get("FILE_OFFLOAD_PREFIX", "/internal/")
+# Media fayl nomlari mazmundan olinadi - brauzer keshida bir yil
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Media fayllar mazmun xeshi bilan nomlanadi - bir xil rasm diskda bitta
+# (test_app/storage.py). Havolasiz fayllar: manage.py purge_unused_media
+STORAGES = {
+    "default": {"BACKEND": "test_app.storage.ContentAddressedStorage"},
+    # collectstatic xeshli nomlar va .gz/.br nusxalar yozadi (brotli ixtiyoriy)
+    "staticfiles": {
+        "BACKEND": "test_app.storage.PrecompressedManifestStaticFilesStorage",
+    },
+}
+
+
+# Cache
+# Shablon fragmentlari shu yerda saqlanadi. Katalog versiyalari DB da
+# (Subject.catalog_version), shuning uchun workerlar orasida umumiy kesh
+# to'g'rilik uchun shart emas - faqat xotirani tejaydi.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Savollar banki snapshotining maksimal yoshi (soniya)
+CATALOG_TTL = 300
+
+# Random test sessiyasi (berilgan savollar to'plami) amal qilish muddati (soniya)
+RANDOM_TEST_SESSION_MAX_AGE = 2 * 60 * 60
+
+# Topshiruv javoblarini saqlash: "packed" - topshiruvda bitta blob
+# (test_app/packing.py), "rows" - har savolga UserAnswer qatori
+ATTEMPT_ANSWER_STORAGE = os.environ.get("ATTEMPT_ANSWER_STORAGE", "packed")
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
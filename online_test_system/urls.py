@@ -1,9 +1,12 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
 
+from test_app import serving
+
 urlpatterns = [
     # 🔑 TILNI O‘ZGARTIRISH UCHUN (set_language)
     path("i18n/", include("django.conf.urls.i18n")),
@@ -14,6 +17,16 @@ urlpatterns += i18n_patterns(
     path("", include("test_app.urls")),
 )
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# Statik fayllarni PrecompressedStaticMiddleware yuboradi
+if settings.SERVE_FILES:
+    urlpatterns += [
+        re_path(
+            r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+            serving.serve,
+            {
+                "document_root": settings.MEDIA_ROOT,
+                "offload_location": "media/",
+                "cache_max_age": settings.MEDIA_CACHE_MAX_AGE,
+            },
+        ),
+    ]
@@ -11,22 +11,6 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 });
 
-// Animation for slide out
-const style = document.createElement('style');
-style.textContent = `
-    @keyframes slideOut {
-        from {
-            transform: translateY(0);
-            opacity: 1;
-        }
-        to {
-            transform: translateY(-20px);
-            opacity: 0;
-        }
-    }
-`;
-document.head.appendChild(style);
-
 // Test submission confirmation
 function confirmSubmit() {
     const inputs = document.querySelectorAll('input[type="radio"]:checked');
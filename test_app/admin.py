@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
 from .models import (
     Subject,
     Test,
@@ -7,11 +8,39 @@ from .models import (
     UserProfile,
     UserTestAttempt,
     UserAnswer,
+    UserTestProgress,
+    RandomTestSession,
+    LeaderboardEntry,
 )
-import csv
-from django.http import HttpResponse
-from django.utils.html import format_html
+import io
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.html import format_html, format_html_join
 from django import forms
+from .catalog import catalog
+from .pagination import EstimatedCountPaginator, KeysetChangeList
+from .question_io import (
+    ImportInterrupted,
+    csv_lines,
+    export_csv,
+    export_jsonl,
+    import_questions,
+)
+
+ATTEMPT_EXPORT_COLUMNS = [
+    "Foydalanuvchi",
+    "Fan",
+    "Test",
+    "Ball",
+    "Savollar",
+    "Foiz",
+    "Yakunlangan",
+]
 
 
 class AnswerInline(admin.TabularInline):
@@ -44,16 +73,25 @@ class SubjectAdmin(admin.ModelAdmin):
         "test_count",
         "random_test_question_count",
         "random_test_min_score",
+        "random_test_stratified",
         "created_at",
     ]
     search_fields = ["name"]
     list_filter = ["created_at"]
-    list_editable = ["random_test_question_count", "random_test_min_score"]
+    list_editable = [
+        "random_test_question_count",
+        "random_test_min_score",
+        "random_test_stratified",
+    ]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(test_count=Count("tests"))
 
     def test_count(self, obj):
-        return obj.tests.count()
+        return obj.test_count
 
     test_count.short_description = "Testlar soni"
+    test_count.admin_order_field = "test_count"
 
 
 class QuestionInline(admin.StackedInline):
@@ -79,11 +117,18 @@ class TestAdmin(admin.ModelAdmin):
     search_fields = ["name"]
     inlines = [QuestionInline]
     list_editable = ["order", "min_score_to_unlock"]
+    list_select_related = ["subject"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            question_count=Count("questions")
+        )
 
     def question_count(self, obj):
-        return obj.questions.count()
+        return obj.question_count
 
     question_count.short_description = "Savollar soni"
+    question_count.admin_order_field = "question_count"
 
 
 class AnswerForm(forms.ModelForm):
@@ -103,6 +148,36 @@ class AnswerForm(forms.ModelForm):
             )
 
 
+class TestListFilter(admin.RelatedFieldListFilter):
+    """Test filtri - har test nomi uchun fan alohida o'qilmaydi"""
+
+    def field_choices(self, field, request, model_admin):
+        return [
+            (test.pk, str(test))
+            for test in Test.objects.select_related("subject").order_by(
+                "subject", "order"
+            )
+        ]
+
+
+class BulkQuestionForm(forms.Form):
+    """Ko'p savollarni bir vaqtda kiritish uchun form"""
+
+    test = forms.ModelChoiceField(
+        queryset=Test.objects.select_related("subject").order_by("subject", "order"),
+        label="Test",
+    )
+    questions_file = forms.FileField(
+        label="CSV fayl",
+        help_text=(
+            "CSV formatda (UTF-8): savol,A,B,C,D,to'gri_javob (a,b,c,d), so'ng "
+            "ixtiyoriy ru va en bloklari (savol,A,B,C,D). Sarlavha qatori bo'lsa "
+            "ustunlar nomi bo'yicha: question_uz, a_ru, ..., correct, order. "
+            "Eksport qilingan .csv va .jsonl fayllar ham qabul qilinadi"
+        ),
+    )
+
+
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     form = QuestionForm
@@ -113,11 +188,71 @@ class QuestionAdmin(admin.ModelAdmin):
         "order",
         "answer_count",
     ]
-    list_filter = ["test__subject", "test"]
+    list_filter = ["test__subject", ("test", TestListFilter)]
     search_fields = ["question_text"]
     inlines = [AnswerInline]
+    # Test.__str__ fan nomini ham o'qiydi
+    list_select_related = ["test__subject"]
     list_editable = ["order"]
-    actions = ["export_questions"]
+    actions = ["export_questions", "export_questions_jsonl"]
+    change_list_template = "admin/test_app/question/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="test_app_question_import",
+            ),
+            *super().get_urls(),
+        ]
+
+    def import_view(self, request):
+        """CSV dan savollarni ommaviy import qilish"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        result = None
+        form = BulkQuestionForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            test = form.cleaned_data["test"]
+            upload = form.cleaned_data["questions_file"]
+            # Fayl xotiraga to'liq o'qilmaydi - qatorma-qator
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            file_format = "jsonl" if upload.name.endswith(".jsonl") else "csv"
+            try:
+                result = import_questions(test, lines, file_format)
+            except ImportInterrupted as exc:
+                form.add_error(
+                    "questions_file", f"Faylni o'qib bo'lmadi: {exc.__cause__}"
+                )
+                if exc.created:
+                    self.message_user(
+                        request,
+                        f"{test}: xatogacha {exc.created} ta savol qo'shildi",
+                        messages.WARNING,
+                    )
+            else:
+                level = messages.WARNING if result.error_count else messages.SUCCESS
+                self.message_user(
+                    request,
+                    f"{test}: {result.created} ta savol qo'shildi, "
+                    f"{result.error_count} ta qator xato",
+                    level,
+                )
+            finally:
+                lines.detach()
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Savollarni CSV dan import qilish",
+            "form": form,
+            "result": result,
+        }
+        return TemplateResponse(
+            request, "admin/test_app/question/import.html", context
+        )
 
     def short_question_text(self, obj):
         return (
@@ -133,43 +268,53 @@ class QuestionAdmin(admin.ModelAdmin):
 
     subject_name.short_description = "Fan"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(answer_count=Count("answers"))
+
     def answer_count(self, obj):
-        return obj.answers.count()
+        return obj.answer_count
 
     answer_count.short_description = "Javoblar"
+    answer_count.admin_order_field = "answer_count"
 
     def export_questions(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="questions.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(["Test", "Savol", "A", "B", "C", "D", "To'g'ri javob"])
-
-        for question in queryset:
-            answers = list(question.answers.all().order_by("order"))
-            correct_answer = question.answers.filter(is_correct=True).first()
-
-            # Har doim 4 ta javob bo'lishi uchun
-            answer_texts = ["", "", "", ""]
-            for i, answer in enumerate(answers[:4]):
-                answer_texts[i] = answer.answer_text
-
-            writer.writerow(
-                [
-                    question.test.name,
-                    question.question_text,
-                    answer_texts[0],
-                    answer_texts[1],
-                    answer_texts[2],
-                    answer_texts[3],
-                    correct_answer.order if correct_answer else "",
-                ]
-            )
-
-        return response
+        return self._export(
+            export_csv(self._export_queryset(request, queryset)), "text/csv", "csv"
+        )
 
     export_questions.short_description = "Tanlangan savollarni eksport qilish"
 
+    def export_questions_jsonl(self, request, queryset):
+        return self._export(
+            export_jsonl(self._export_queryset(request, queryset)),
+            "application/x-ndjson",
+            "jsonl",
+        )
+
+    export_questions_jsonl.short_description = (
+        "Tanlangan savollarni eksport qilish (JSON Lines)"
+    )
+
+    def _export_queryset(self, request, queryset):
+        """Changelist ``answer_count`` annotatsiyasi (GROUP BY) va tartibisiz
+        savollar - eksport har bir qator uchun guruhlash narxini to'lamaydi"""
+        if request.POST.get("select_across") == "1":
+            # Filtrdagi barcha savollar: guruhlash faqat id lar subquery sida
+            return Question.objects.filter(pk__in=queryset.order_by().values("pk"))
+        return Question.objects.filter(
+            pk__in=request.POST.getlist(helpers.ACTION_CHECKBOX_NAME)
+        )
+
+    def _export(self, lines, content_type, extension):
+        # Javob qatorma-qator yuboriladi - butun fayl xotirada yig'ilmaydi
+        response = StreamingHttpResponse(
+            lines, content_type=f"{content_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="questions.{extension}"'
+        )
+        return response
+
 
 @admin.register(Answer)
 class AnswerAdmin(admin.ModelAdmin):
@@ -184,6 +329,7 @@ class AnswerAdmin(admin.ModelAdmin):
     list_filter = ["is_correct", "order", "question__test__subject"]
     search_fields = ["answer_text", "question__question_text"]
     list_editable = ["order", "is_correct"]
+    list_select_related = ["question"]
 
     def short_answer_text(self, obj):
         return (
@@ -210,15 +356,6 @@ class AnswerAdmin(admin.ModelAdmin):
     is_correct_badge.short_description = "Holati (badge)"
 
 
-class BulkQuestionForm(forms.Form):
-    """Ko'p savollarni bir vaqtda kiritish uchun form"""
-
-    test = forms.ModelChoiceField(queryset=Test.objects.all(), label="Test")
-    questions_file = forms.FileField(
-        label="CSV fayl", help_text="CSV formatda: savol,A,B,C,D,to'gri_javob (a,b,c,d)"
-    )
-
-
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ["user", "first_name", "last_name", "created_at"]
@@ -244,9 +381,15 @@ class UserTestAttemptAdmin(admin.ModelAdmin):
         "is_passed_badge",
         "completed_at",
     ]
-    list_filter = ["completed", "is_random", "test__subject"]
+    list_filter = ["completed", "is_random", "archived_at", "test__subject"]
     search_fields = ["user__username", "test__name"]
     inlines = [UserAnswerInline]
+    actions = ["export_attempts"]
+    list_select_related = ["user", "test"]
+    # Katta jadval: -started_at indekssiz, -id bo'yicha keyset sahifalash
+    ordering = ["-id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = [
         "user",
         "test",
@@ -255,8 +398,44 @@ class UserTestAttemptAdmin(admin.ModelAdmin):
         "started_at",
         "completed_at",
         "is_random",
+        "archived_at",
+        "packed_answers",
     ]
 
+    def get_inline_instances(self, request, obj=None):
+        # Packed topshiruvda UserAnswer qatorlari yo'q
+        if obj is not None and obj.answers_packed is not None:
+            return []
+        return super().get_inline_instances(request, obj)
+
+    def packed_answers(self, obj):
+        if obj.answers_packed is None:
+            return "-"
+        rows = []
+        for question_id, selected_id, is_correct in obj.answer_records():
+            question = catalog.question(question_id)
+            selected = next(
+                (
+                    answer
+                    for answer in (question.answers if question else ())
+                    if answer.id == selected_id
+                ),
+                None,
+            )
+            rows.append(
+                (
+                    question.question_text if question else f"#{question_id}",
+                    f"{selected.order}) {selected.answer_text}" if selected else "-",
+                    "✓" if is_correct else "✗",
+                )
+            )
+        return format_html(
+            "<table>{}</table>",
+            format_html_join("", "<tr><td>{}</td><td>{}</td><td>{}</td></tr>", rows),
+        )
+
+    packed_answers.short_description = "Javoblar"
+
     def get_test_name(self, obj):
         if obj.is_random:
             return "Random Test"
@@ -278,9 +457,103 @@ class UserTestAttemptAdmin(admin.ModelAdmin):
 
     is_passed_badge.short_description = "Holati"
 
+    def export_attempts(self, request, queryset):
+        # Javob qatorma-qator yuboriladi - butun fayl xotirada yig'ilmaydi
+        response = StreamingHttpResponse(
+            csv_lines(ATTEMPT_EXPORT_COLUMNS, self._export_rows(queryset)),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="attempts.csv"'
+        return response
+
+    def _export_rows(self, queryset):
+        rows = (
+            queryset.order_by("id")
+            .values_list(
+                "user__username",
+                "subject__name",
+                "test__name",
+                "is_random",
+                "score",
+                "total_questions",
+                "completed_at",
+            )
+            .iterator(chunk_size=settings.DB_ITERATOR_CHUNK_SIZE)
+        )
+        for username, subject, test, is_random, score, total, completed_at in rows:
+            percentage = score / total * 100 if total > 0 else 0
+            yield [
+                username,
+                subject or "",
+                "Random Test" if is_random else test or "",
+                score,
+                total,
+                f"{percentage:.1f}",
+                completed_at.isoformat() if completed_at else "",
+            ]
+
+    export_attempts.short_description = "Tanlangan topshiruvlarni eksport qilish"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
 
 @admin.register(UserAnswer)
 class UserAnswerAdmin(admin.ModelAdmin):
     list_display = ["attempt", "question", "selected_answer", "is_correct"]
     list_filter = ["is_correct", "attempt__is_random"]
     readonly_fields = ["attempt", "question", "selected_answer", "is_correct"]
+    list_select_related = [
+        "attempt__user",
+        "attempt__test",
+        "question__test",
+        "selected_answer",
+    ]
+    ordering = ["-id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+@admin.register(UserTestProgress)
+class UserTestProgressAdmin(admin.ModelAdmin):
+    list_display = [
+        "user",
+        "test",
+        "last_score",
+        "last_total",
+        "best_percentage",
+        "passed",
+    ]
+    list_filter = ["passed", "test__subject"]
+    search_fields = ["user__username", "test__name"]
+    # Test.__str__ fan nomini ham o'qiydi
+    list_select_related = ["user", "test__subject"]
+    readonly_fields = [
+        "user",
+        "test",
+        "last_attempt",
+        "last_score",
+        "last_total",
+        "best_percentage",
+        "passed",
+    ]
+
+
+@admin.register(RandomTestSession)
+class RandomTestSessionAdmin(admin.ModelAdmin):
+    list_display = ["user", "subject", "created_at", "submitted_at", "attempt"]
+    list_filter = ["subject"]
+    search_fields = ["user__username"]
+    list_select_related = ["user", "subject", "attempt__user", "attempt__test"]
+    readonly_fields = ["attempt", "submitted_at"]
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ["user", "subject", "test", "best_percentage", "achieved_at"]
+    list_filter = ["subject"]
+    search_fields = ["user__username"]
+    list_select_related = ["user", "subject", "test__subject"]
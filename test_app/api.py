@@ -0,0 +1,119 @@
+"""Test kontenti uchun faqat o'qiladigan JSON API.
+
+Faqat tizimga kirgan foydalanuvchilar uchun; test savollari faqat test
+ochilgan bo'lsa beriladi. Javoblar ``is_correct`` belgisisiz. Har bir javob
+kuchli ETag bilan yuboriladi (katalog versiyasi + til), ``If-None-Match``
+mos kelsa 304 qaytadi. Kesh ``private`` - umumiy proksilar saqlamaydi,
+faqat foydalanuvchi brauzeri.
+"""
+
+import hashlib
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.translation import get_language
+from django.views.decorators.http import condition, require_safe
+
+from .catalog import catalog, subject_versions
+
+API_VERSION = 1
+API_CACHE_MAX_AGE = 60
+
+
+def _etag(*parts):
+    raw = ":".join(str(part) for part in (API_VERSION, get_language(), *parts))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _json(data):
+    response = JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+    patch_cache_control(response, private=True, max_age=API_CACHE_MAX_AGE)
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+def subjects_etag(request):
+    versions = subject_versions().items()
+    return _etag(*(f"{subject_id}={version}" for subject_id, version in versions))
+
+
+def test_etag(request, test):
+    return _etag("test", test.id, test.version)
+
+
+@login_required
+@require_safe
+@condition(etag_func=subjects_etag)
+def subjects_api_view(request):
+    return _json(
+        {
+            "version": API_VERSION,
+            "language": get_language(),
+            "subjects": [
+                {
+                    "id": subject.id,
+                    "name": subject.name,
+                    "description": subject.description,
+                    "image": subject.image_url,
+                    "thumbnail": subject.image_thumbnail_url,
+                    "random_test_question_count": subject.random_test_question_count,
+                    "tests": [
+                        {
+                            "id": test.id,
+                            "name": test.name,
+                            "order": test.order,
+                            "min_score_to_unlock": test.min_score_to_unlock,
+                            "question_count": test.question_count,
+                        }
+                        for test in subject.tests
+                    ],
+                }
+                for subject in catalog.subjects()
+            ],
+        }
+    )
+
+
+@login_required
+@require_safe
+def test_api_view(request, test_id):
+    test = catalog.test(test_id)
+    if test is None:
+        raise Http404
+    # 304 ham faqat ochilgan test uchun - tekshiruv ETag dan oldin
+    if not test.is_unlocked_for_user(request.user):
+        raise PermissionDenied
+    return _test_response(request, test)
+
+
+@condition(etag_func=test_etag)
+def _test_response(request, test):
+    return _json(
+        {
+            "version": API_VERSION,
+            "language": get_language(),
+            "id": test.id,
+            "subject_id": test.subject_id,
+            "name": test.name,
+            "order": test.order,
+            "min_score_to_unlock": test.min_score_to_unlock,
+            "questions": [
+                {
+                    "id": question.id,
+                    "order": question.order,
+                    "text": question.question_text,
+                    "answers": [
+                        {
+                            "id": answer.id,
+                            "order": answer.order,
+                            "text": answer.answer_text,
+                        }
+                        for answer in question.answers
+                    ],
+                }
+                for question in test.questions
+            ],
+        }
+    )
@@ -9,3 +9,5 @@ class TestAppConfig(AppConfig):
 
     def ready(self):
         import test_app.translation
+        import test_app.signals
+        import test_app.dblocks
@@ -0,0 +1,209 @@
+"""Imtihon ko'rinishlarining async versiyalari (ASGI uchun).
+
+``ASYNC_EXAM_VIEWS`` yoqilganda ``test_app.urls`` test yechish, topshirish,
+random test va natija sahifalari uchun shu ko'rinishlarni ishlatadi. O'qishlar
+Django async ORM orqali bajariladi; tranzaksiyali baholash, katalog
+yuklanishi va shablon chizish ``sync_to_async`` ichida ishlaydi, shuning
+uchun bitta ASGI worker ko'plab imtihon sessiyalarini ushlab tura oladi.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.utils.translation import gettext as _
+
+from .catalog import catalog
+from .grading import grade_submission
+from .models import RandomTestSession, Subject, Test, UserTestAttempt
+from .results import result_rows
+from .sampling import sample_questions
+from .views import (
+    _announce_random_result,
+    _announce_test_result,
+    _grade_random_session,
+    _random_test_context,
+    _result_payload,
+    _session_questions,
+)
+
+arender = sync_to_async(render)
+
+
+@login_required
+async def take_test_view(request, test_id):
+    user = await request.auser()
+    test = await sync_to_async(catalog.test)(test_id)
+    if test is None:
+        raise Http404
+
+    if not await test.ais_unlocked_for_user(user):
+        messages.error(
+            request,
+            _("Bu test hali ochilmagan! Avval oldingi testdan o‘tishingiz kerak."),
+        )
+        return redirect("subject_tests", subject_id=test.subject_id)
+
+    last_attempt = await UserTestAttempt.current_for(user, test.id).afirst()
+
+    previous_answers = {}
+    if last_attempt:
+        rows = await sync_to_async(last_attempt.answer_records)()
+        for question_id, selected_id, is_correct in rows:
+            if selected_id is None:
+                continue
+            previous_answers[question_id] = {
+                "selected": selected_id,
+                "is_correct": is_correct,
+            }
+
+    return await arender(
+        request,
+        "take_test.html",
+        {
+            "test": test,
+            "questions": test.questions,
+            "cache_timeout": settings.CATALOG_TTL,
+            "previous_answers": json.dumps(previous_answers),
+            "has_previous": last_attempt is not None,
+            "min_score_to_unlock": test.min_score_to_unlock,
+        },
+    )
+
+
+@login_required
+async def submit_test_view(request, test_id):
+    if request.method != "POST":
+        return redirect("home")
+
+    user = await request.auser()
+    test = await aget_object_or_404(Test, id=test_id)
+    entry = await sync_to_async(catalog.test)(test.id)
+
+    attempt = await sync_to_async(grade_submission)(
+        user, entry.questions, request.POST, test=test
+    )
+
+    next_test = None
+    if entry.next_test_id is not None:
+        next_test = await sync_to_async(catalog.test)(entry.next_test_id)
+    _announce_test_result(request, test, attempt, next_test)
+
+    return redirect("test_result", attempt_id=attempt.id)
+
+
+@login_required
+async def test_result_view(request, attempt_id):
+    user = await request.auser()
+    attempt = await aget_object_or_404(
+        UserTestAttempt.objects.select_related("test__subject", "result"),
+        id=attempt_id,
+        user=user,
+    )
+    payload = await sync_to_async(_result_payload)(attempt)
+
+    return await arender(
+        request,
+        "test_result.html",
+        {
+            "attempt": attempt,
+            "results": result_rows(payload),
+            "min_score": attempt.test.min_score_to_unlock if attempt.test else 80,
+        },
+    )
+
+
+@login_required
+async def take_random_test_view(request, subject_id):
+    user = await request.auser()
+    snapshot = await sync_to_async(catalog.snapshot)(subject_id)
+    if snapshot is None:
+        raise Http404
+    subject = snapshot.subject
+
+    unlocked_tests = await subject.aunlocked_tests_for_user(user)
+
+    if not unlocked_tests:
+        messages.error(request, _("Sizda hali ochilgan testlar mavjud emas!"))
+        return redirect("subject_tests", subject_id=subject_id)
+
+    session = await RandomTestSession.aopen_for(user, subject.id)
+    if session is not None:
+        random_questions = await sync_to_async(_session_questions)(session)
+    else:
+        random_questions = sample_questions(
+            snapshot,
+            unlocked_tests,
+            subject.random_test_question_count,
+            stratify=subject.random_test_stratified,
+        )
+
+    if len(random_questions) < 5:
+        messages.error(
+            request,
+            _("Random test uchun yetarli savol mavjud emas!"),
+        )
+        return redirect("subject_tests", subject_id=subject_id)
+
+    if session is None:
+        session = RandomTestSession(user=user, subject_id=subject.id)
+        session.set_question_ids(question.id for question in random_questions)
+        await session.asave()
+
+    return await arender(
+        request,
+        "take_random_test.html",
+        _random_test_context(subject, session, random_questions),
+    )
+
+
+@login_required
+async def submit_random_test_view(request, subject_id):
+    if request.method != "POST":
+        return redirect("home")
+
+    user = await request.auser()
+    subject = await aget_object_or_404(Subject, id=subject_id)
+    session = await RandomTestSession.aopen_for(user, subject.id)
+
+    if session is None or str(session.id) != request.POST.get("session"):
+        messages.error(request, _("Savollar topilmadi!"))
+        return redirect("subject_tests", subject_id=subject_id)
+
+    questions = await sync_to_async(_session_questions)(session)
+    attempt = await sync_to_async(_grade_random_session)(
+        user, session, questions, request.POST
+    )
+    if attempt is None:
+        messages.error(request, _("Savollar topilmadi!"))
+        return redirect("subject_tests", subject_id=subject_id)
+
+    _announce_random_result(request, subject, attempt)
+
+    return redirect("random_test_result", attempt_id=attempt.id)
+
+
+@login_required
+async def random_test_result_view(request, attempt_id):
+    user = await request.auser()
+    attempt = await aget_object_or_404(
+        UserTestAttempt.objects.select_related("result"),
+        id=attempt_id,
+        user=user,
+        is_random=True,
+    )
+    payload = await sync_to_async(_result_payload)(attempt)
+
+    return await arender(
+        request,
+        "random_test_result.html",
+        {
+            "attempt": attempt,
+            "results": result_rows(payload),
+            "min_score": 60,
+        },
+    )
@@ -0,0 +1,191 @@
+"""Yuklama o'lchovlari uchun umumiy yordamchilar.
+
+Benchmark buyruqlari haqiqiy bazaga tegmaydi: ``isolated_database`` vaqtinchalik
+faylda alohida test bazasini yaratadi (migratsiyalar bilan) va oxirida o'chiradi.
+"""
+
+import math
+import os
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings
+
+from .models import Answer, Question, Subject, Test, UserProfile
+
+
+def percentile(samples, fraction):
+    """Saralangan namunalardan nearest-rank persentil"""
+    if not samples:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(samples)) - 1)
+    return samples[index]
+
+
+def summarize(samples, elapsed):
+    """Kechikishlar (soniya) ro'yxatidan throughput va p50/p95/p99 (ms)"""
+    samples = sorted(samples)
+    return {
+        "requests": len(samples),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+    }
+
+
+class Timer:
+    """Ko'rinishlar bo'yicha kechikishlar; ixtiyoriy ravishda SQL so'rovlar soni.
+
+    So'rovlar joriy oqimning ulanishida sanaladi - in-process klient
+    ko'rinishni shu oqimda bajaradi.
+    """
+
+    def __init__(self, count_queries=False):
+        self.count_queries = count_queries
+        self.samples = {}
+        self.queries = {}
+        self.errors = {}
+
+    @contextmanager
+    def measure(self, name):
+        executed = []
+
+        def counter(execute, sql, params, many, context):
+            executed.append(sql)
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            if self.count_queries:
+                with connection.execute_wrapper(counter):
+                    yield
+            else:
+                yield
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - started)
+            if self.count_queries:
+                self.queries.setdefault(name, []).append(len(executed))
+
+    def error(self, name):
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def merge(self, other):
+        for name, samples in other.samples.items():
+            self.samples.setdefault(name, []).extend(samples)
+        for name, counts in other.queries.items():
+            self.queries.setdefault(name, []).extend(counts)
+        for name, count in other.errors.items():
+            self.errors[name] = self.errors.get(name, 0) + count
+
+    def report(self, elapsed):
+        """Har ko'rinish uchun ``summarize`` + xatolar va so'rovlar soni"""
+        views = {}
+        for name, samples in sorted(self.samples.items()):
+            row = summarize(samples, elapsed)
+            row["errors"] = self.errors.get(name, 0)
+            counts = self.queries.get(name)
+            if counts:
+                row["queries_mean"] = round(sum(counts) / len(counts), 1)
+                row["queries_max"] = max(counts)
+            views[name] = row
+        return views
+
+
+def git_revision():
+    """Joriy commit (natijalarni commitlar bo'yicha solishtirish uchun)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def isolated_database():
+    """Vaqtinchalik fayldagi test bazasi - SQLite da ham oqimlar bo'lisha oladi.
+
+    Migratsiyalar yaratadigan rasmlar ham vaqtinchalik ``MEDIA_ROOT`` ga tushadi.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        if connection.vendor == "sqlite":
+            test_settings["NAME"] = os.path.join(workdir, "db.sqlite3")
+        old_name = connection.settings_dict["NAME"]
+        with override_settings(MEDIA_ROOT=os.path.join(workdir, "media")):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                yield
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_exam_content(subjects=2, tests=3, questions=10):
+    """O'lchov uchun kichik savollar banki; har savolda "a" javobi to'g'ri.
+
+    Yaratilgan fanlar ro'yxatini qaytaradi.
+    """
+    created = []
+    for s in range(1, subjects + 1):
+        subject = Subject.objects.create(
+            name_uz=f"Fan {s}", name_ru=f"Предмет {s}", name_en=f"Subject {s}"
+        )
+        created.append(subject)
+        for t in range(1, tests + 1):
+            test = Test.objects.create(
+                subject=subject,
+                order=t,
+                name_uz=f"Test {t}",
+                name_ru=f"Тест {t}",
+                name_en=f"Test {t}",
+            )
+            for q in range(1, questions + 1):
+                question = Question.objects.create(
+                    test=test,
+                    order=q,
+                    question_text_uz=f"Savol {q}",
+                    question_text_ru=f"Вопрос {q}",
+                    question_text_en=f"Question {q}",
+                )
+                Answer.objects.bulk_create(
+                    Answer(
+                        question=question,
+                        order=letter,
+                        is_correct=letter == "a",
+                        answer_text_uz=f"Javob {letter}",
+                        answer_text_ru=f"Ответ {letter}",
+                        answer_text_en=f"Answer {letter}",
+                    )
+                    for letter in "abcd"
+                )
+    return created
+
+
+def create_users(count, prefix="bench"):
+    users = []
+    for i in range(count):
+        user = User.objects.create_user(f"{prefix}{i}", password="bench-pass")
+        UserProfile.objects.create(user=user, first_name="Bench", last_name=str(i))
+        users.append(user)
+    return users
+
+
+def correct_answers(test):
+    """Test uchun to'g'ri javoblar bilan POST ma'lumoti"""
+    return {
+        f"question_{question_id}": answer_id
+        for question_id, answer_id in Answer.objects.filter(
+            question__test=test, is_correct=True
+        ).values_list("question_id", "id")
+    }
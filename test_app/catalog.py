@@ -0,0 +1,477 @@
+"""Savollar banki uchun worker ichidagi, faqat o'qiladigan snapshot.
+
+Fanlar, testlar, savollar va javoblar kam o'zgaradi, lekin har so'rovda
+o'qiladi. Har bir fan bitta kompakt snapshot sifatida (4 ta so'rov bilan)
+yuklanadi: tarjimalar kortejlarda, javob kalitlari va testlar zanjiri
+oldindan hisoblangan. Admin o'zgarishlari signallar orqali fan versiyasini
+yangilaydi (``bump_subject``), workerlar esa faqat o'zgargan fanni keyingi
+murojaatda qayta yuklaydi.
+
+Versiya - ``Subject.catalog_version`` ustuni: o'zgarish bilan bitta
+tranzaksiyada yoziladi va barcha workerlar uni bir xil ko'radi. So'rov
+davomida (``CatalogVersionMiddleware``) har fan versiyasi bir marta
+o'qiladi. ``CATALOG_TTL`` (soniya) har qanday holatda snapshotning maksimal
+yoshini cheklaydi.
+"""
+
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.translation import get_language
+
+from .thumbnails import srcset
+
+LANGUAGE_CODES = tuple(code for code, _name in settings.LANGUAGES)
+
+# So'rov ichida o'qilgan versiyalar: {subject_id: versiya}
+_request_versions = ContextVar("catalog_request_versions", default=None)
+# request_scope ichida barcha fanlar ro'yxati shu kalit ostida
+ALL_SUBJECTS = "*"
+
+
+def translate(texts):
+    """Faol tildagi matn; bo'sh bo'lsa standart til, so'ng birinchi mavjud"""
+    language = (get_language() or settings.LANGUAGE_CODE).split("-")[0]
+    for code in (language, settings.LANGUAGE_CODE):
+        if code in LANGUAGE_CODES:
+            value = texts[LANGUAGE_CODES.index(code)]
+            if value:
+                return value
+    return next((value for value in texts if value), "")
+
+
+def _texts(row, field):
+    return tuple(row[f"{field}_{code}"] for code in LANGUAGE_CODES)
+
+
+def _columns(field):
+    return [f"{field}_{code}" for code in LANGUAGE_CODES]
+
+
+class CatalogAnswer(
+    namedtuple("CatalogAnswer", "id question_id order is_correct texts")
+):
+    __slots__ = ()
+
+    @property
+    def answer_text(self):
+        return translate(self.texts)
+
+
+class CatalogQuestion(
+    namedtuple("CatalogQuestion", "id test_id order texts answers correct_answer_id")
+):
+    __slots__ = ()
+
+    @property
+    def question_text(self):
+        return translate(self.texts)
+
+    def correct_answer(self):
+        for answer in self.answers:
+            if answer.id == self.correct_answer_id:
+                return answer
+        return None
+
+
+class CatalogTest(
+    namedtuple(
+        "CatalogTest",
+        "id subject_id order min_score_to_unlock names questions "
+        "prev_test_id next_test_id prev_min_score version",
+    )
+):
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return translate(self.names)
+
+    @property
+    def question_count(self):
+        return len(self.questions)
+
+    @property
+    def question_ids(self):
+        return tuple(question.id for question in self.questions)
+
+    def is_unlocked_for_user(self, user):
+        """Foydalanuvchi uchun test ochiqmi - oldingi testdagi oxirgi natija
+        uning chegarasidan o'tganmi (progress jadvalidan bitta so'rov)"""
+        if self.order == 1 or self.prev_test_id is None:
+            return True
+        return self._previous_passed(user).exists()
+
+    async def ais_unlocked_for_user(self, user):
+        if self.order == 1 or self.prev_test_id is None:
+            return True
+        return await self._previous_passed(user).aexists()
+
+    def _previous_passed(self, user):
+        from .models import UserTestProgress
+
+        return UserTestProgress.objects.filter(
+            UserTestProgress.reached_condition(self.prev_min_score),
+            user=user,
+            test_id=self.prev_test_id,
+        )
+
+
+class CatalogSubject(
+    namedtuple(
+        "CatalogSubject",
+        "id names descriptions image image_variants random_test_question_count "
+        "random_test_min_score random_test_stratified tests",
+    )
+):
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return translate(self.names)
+
+    @property
+    def description(self):
+        return translate(self.descriptions)
+
+    @property
+    def image_url(self):
+        return default_storage.url(self.image) if self.image else ""
+
+    @property
+    def image_thumbnail(self):
+        """Eng kichik JPEG nusxa (``src`` va o'lchamlar uchun); yo'q bo'lsa None"""
+        items = self.image_variants.get("jpeg")
+        return items[0] if items else None
+
+    @property
+    def image_thumbnail_url(self):
+        thumbnail = self.image_thumbnail
+        return default_storage.url(thumbnail["name"]) if thumbnail else self.image_url
+
+    @property
+    def image_srcset(self):
+        return srcset(self.image_variants, "jpeg")
+
+    @property
+    def image_webp_srcset(self):
+        return srcset(self.image_variants, "webp")
+
+    @property
+    def test_count(self):
+        return len(self.tests)
+
+    def unlocked_tests_for_user(self, user):
+        """Foydalanuvchi uchun ochilgan testlar - progress jadvalidan bitta so'rov"""
+        return self._unlocked_tests(self._last_results(user))
+
+    async def aunlocked_tests_for_user(self, user):
+        rows = self._last_results(user)
+        return self._unlocked_tests([row async for row in rows])
+
+    def _last_results(self, user):
+        from .models import UserTestProgress
+
+        return UserTestProgress.objects.filter(
+            user=user, test_id__in=[test.id for test in self.tests]
+        ).values_list("test_id", "last_score", "last_total")
+
+    def _unlocked_tests(self, rows):
+        """Oldingi test chegarasidan (oxirgi natija bilan) o'tilgan bo'lsa test
+        ochiq - holat o'qishda hisoblanadi, test qo'shilsa yoki chegara
+        o'zgarsa ham to'g'ri"""
+        from .models import UserTestProgress
+
+        by_id = {test.id: test for test in self.tests}
+        passed = {
+            test_id
+            for test_id, score, total in rows
+            if UserTestProgress.reached(
+                score, total, by_id[test_id].min_score_to_unlock
+            )
+        }
+        return [
+            test
+            for test in self.tests
+            if test.order == 1
+            or test.prev_test_id is None
+            or test.prev_test_id in passed
+        ]
+
+
+class SubjectSnapshot:
+    """Bitta fanning yuklangan holati va uning indekslari"""
+
+    __slots__ = (
+        "version",
+        "loaded_at",
+        "subject",
+        "tests",
+        "questions",
+        "answers",
+        "pools",
+    )
+
+    def __init__(self, version, subject, tests, questions, answers):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.subject = subject
+        self.tests = tests
+        self.questions = questions
+        self.answers = answers
+        # Random test uchun id pullari (sampling.question_pool)
+        self.pools = {}
+
+
+def _load_subject(subject_id, version):
+    from .models import Answer, Question, Subject, Test
+
+    subject = (
+        Subject.objects.filter(id=subject_id)
+        .values(
+            "id",
+            "image",
+            "image_variants",
+            "random_test_question_count",
+            "random_test_min_score",
+            "random_test_stratified",
+            *_columns("name"),
+            *_columns("description"),
+        )
+        .first()
+    )
+    if subject is None:
+        return None
+
+    answers_by_question = {}
+    answers = {}
+    for row in (
+        Answer.objects.filter(question__test__subject_id=subject_id)
+        .order_by("order", "id")
+        .values("id", "question_id", "order", "is_correct", *_columns("answer_text"))
+    ):
+        answer = CatalogAnswer(
+            row["id"],
+            row["question_id"],
+            row["order"],
+            row["is_correct"],
+            _texts(row, "answer_text"),
+        )
+        answers[answer.id] = answer
+        answers_by_question.setdefault(answer.question_id, []).append(answer)
+
+    questions_by_test = {}
+    questions = {}
+    for row in (
+        Question.objects.filter(test__subject_id=subject_id)
+        .order_by("order", "id")
+        .values("id", "test_id", "order", *_columns("question_text"))
+    ):
+        question_answers = tuple(answers_by_question.get(row["id"], ()))
+        correct = next((a.id for a in question_answers if a.is_correct), None)
+        question = CatalogQuestion(
+            row["id"],
+            row["test_id"],
+            row["order"],
+            _texts(row, "question_text"),
+            question_answers,
+            correct,
+        )
+        questions[question.id] = question
+        questions_by_test.setdefault(question.test_id, []).append(question)
+
+    rows = list(
+        Test.objects.filter(subject_id=subject_id)
+        .order_by("order")
+        .values("id", "order", "min_score_to_unlock", *_columns("name"))
+    )
+    by_order = {row["order"]: row for row in rows}
+    tests = {}
+    for row in rows:
+        previous = by_order.get(row["order"] - 1)
+        following = by_order.get(row["order"] + 1)
+        tests[row["id"]] = CatalogTest(
+            row["id"],
+            subject_id,
+            row["order"],
+            row["min_score_to_unlock"],
+            _texts(row, "name"),
+            tuple(questions_by_test.get(row["id"], ())),
+            previous and previous["id"],
+            following and following["id"],
+            previous and previous["min_score_to_unlock"],
+            version,
+        )
+
+    entry = CatalogSubject(
+        subject["id"],
+        _texts(subject, "name"),
+        _texts(subject, "description"),
+        subject["image"],
+        subject["image_variants"] or {},
+        subject["random_test_question_count"],
+        subject["random_test_min_score"],
+        subject["random_test_stratified"],
+        tuple(tests.values()),
+    )
+    return SubjectSnapshot(version, entry, tests, questions, answers)
+
+
+@contextmanager
+def request_scope():
+    """Blok ichida har fan versiyasi DB dan bir marta o'qiladi"""
+    token = _request_versions.set({})
+    try:
+        yield
+    finally:
+        _request_versions.reset(token)
+
+
+def subject_version(subject_id):
+    """Fan kontenti versiyasi; fan yo'q bo'lsa None"""
+    from .models import Subject
+
+    known = _request_versions.get()
+    if known is not None and subject_id in known:
+        return known[subject_id]
+    version = (
+        Subject.objects.filter(id=subject_id)
+        .values_list("catalog_version", flat=True)
+        .first()
+    )
+    if known is not None:
+        known[subject_id] = version
+    return version
+
+
+def subject_versions():
+    """{subject_id: versiya} barcha fanlar uchun (id bo'yicha) - bitta so'rov"""
+    from .models import Subject
+
+    known = _request_versions.get()
+    if known is not None and ALL_SUBJECTS in known:
+        return known[ALL_SUBJECTS]
+    versions = dict(
+        Subject.objects.order_by("id").values_list("id", "catalog_version")
+    )
+    if known is not None:
+        known.update(versions)
+        known[ALL_SUBJECTS] = versions
+    return versions
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def bump_subject(subject_id):
+    """Fan versiyasini yangilaydi - chaqiruvchi tranzaksiyasi ichida"""
+    from .models import Subject
+
+    Subject.objects.filter(id=subject_id).update(catalog_version=new_version())
+    known = _request_versions.get()
+    if known is not None:
+        known.pop(subject_id, None)
+        known.pop(ALL_SUBJECTS, None)
+
+
+class Catalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        # id -> subject_id; snapshot yuklanganda to'ldiriladi
+        self._test_owner = {}
+        self._question_owner = {}
+
+    def _is_fresh(self, version, loaded_at, current):
+        ttl = getattr(settings, "CATALOG_TTL", None)
+        if ttl is not None and time.monotonic() - loaded_at > ttl:
+            return False
+        return version == current
+
+    def snapshot(self, subject_id, current=None):
+        if current is None:
+            current = subject_version(subject_id)
+        if current is None:
+            self._snapshots.pop(subject_id, None)
+            return None
+        snap = self._snapshots.get(subject_id)
+        if snap is not None and self._is_fresh(snap.version, snap.loaded_at, current):
+            return snap
+
+        with self._lock:
+            snap = self._snapshots.get(subject_id)
+            if snap is not None and self._is_fresh(
+                snap.version, snap.loaded_at, current
+            ):
+                return snap
+
+            snap = _load_subject(subject_id, current)
+            if snap is None:
+                self._snapshots.pop(subject_id, None)
+                return None
+            self._snapshots[subject_id] = snap
+            self._test_owner.update(dict.fromkeys(snap.tests, subject_id))
+            self._question_owner.update(dict.fromkeys(snap.questions, subject_id))
+            return snap
+
+    def subject(self, subject_id):
+        snap = self.snapshot(subject_id)
+        return snap.subject if snap else None
+
+    def subjects(self):
+        """Barcha fanlar (id bo'yicha tartibda)"""
+        subjects = (
+            self.snapshot(subject_id, version)
+            for subject_id, version in subject_versions().items()
+        )
+        return [snap.subject for snap in subjects if snap is not None]
+
+    def _lookup(self, owners, index, item_id, owner_query):
+        subject_id = owners.get(item_id)
+        if subject_id is not None:
+            snap = self.snapshot(subject_id)
+            if snap is not None and item_id in getattr(snap, index):
+                return getattr(snap, index)[item_id]
+
+        # Birinchi murojaat yoki boshqa fanga ko'chirilgan - egasini DB dan topamiz
+        subject_id = owner_query.first()
+        snap = self.snapshot(subject_id) if subject_id is not None else None
+        return getattr(snap, index).get(item_id) if snap else None
+
+    def test(self, test_id):
+        from .models import Test
+
+        return self._lookup(
+            self._test_owner,
+            "tests",
+            test_id,
+            Test.objects.filter(id=test_id).values_list("subject_id", flat=True),
+        )
+
+    def question(self, question_id):
+        from .models import Question
+
+        return self._lookup(
+            self._question_owner,
+            "questions",
+            question_id,
+            Question.objects.filter(id=question_id).values_list(
+                "test__subject_id", flat=True
+            ),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._test_owner.clear()
+            self._question_owner.clear()
+
+
+catalog = Catalog()
@@ -0,0 +1,129 @@
+"""SQLite yozuv raqobati: qayta urinish va lock o'lchovlari.
+
+SQLite bir vaqtda faqat bitta yozuvchiga ruxsat beradi. Sozlamalarda yozuv
+tranzaksiyalari ``BEGIN IMMEDIATE`` bilan ochiladi va busy ``timeout``
+beriladi - yozuvchilar navbatda kutadi. Navbat juda uzun bo'lsa ham
+``retry_on_lock`` tranzaksiyani cheklangan marta, tasodifiy kechikish bilan
+qayta ishga tushiradi.
+
+Hisoblagichlar jarayon ichida (``snapshot``):
+
+- ``lock_waits`` / ``lock_wait_seconds`` - ``BEGIN IMMEDIATE`` uzoq kutgan
+  holatlar (``DB_LOCK_WAIT_THRESHOLD`` soniyadan ortiq);
+- ``lock_errors`` - "database is locked" xatolari;
+- ``retries`` - qayta urinishlar;
+- ``failures`` - barcha urinishlar tugagandan keyingi xatolar.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = {}
+
+
+def _reset():
+    _counters.update(
+        lock_waits=0, lock_wait_seconds=0.0, lock_errors=0, retries=0, failures=0
+    )
+
+
+_reset()
+
+
+def _count(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot():
+    """Hisoblagichlarning joriy qiymatlari"""
+    with _lock:
+        data = dict(_counters)
+    data["lock_wait_seconds"] = round(data["lock_wait_seconds"], 3)
+    return data
+
+
+def reset():
+    with _lock:
+        _reset()
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and "locked" in str(exc)
+
+
+def _lock_wrapper(execute, sql, params, many, context):
+    """Har bir so'rovni kuzatadi: BEGIN kutishlari va lock xatolari"""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    except OperationalError as exc:
+        if is_lock_error(exc):
+            _count("lock_errors")
+        raise
+    finally:
+        if sql.startswith("BEGIN"):
+            waited = time.perf_counter() - started
+            if waited >= settings.DB_LOCK_WAIT_THRESHOLD:
+                _count("lock_waits")
+                _count("lock_wait_seconds", waited)
+
+
+def install(sender, connection, **kwargs):
+    """``connection_created`` qabul qiluvchisi - SQLite ulanishlariga wrapper"""
+    if connection.vendor != "sqlite":
+        return
+    if _lock_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_lock_wrapper)
+
+
+connection_created.connect(install, dispatch_uid="test_app.dblocks.install")
+
+
+def retry_on_lock(func):
+    """Tranzaksiyani "database is locked" da cheklangan marta qayta ishga tushiradi.
+
+    Tashqi ``atomic`` ichida chaqirilsa qayta urinish qilinmaydi - uni eng
+    tashqi tranzaksiya egasi bajaradi.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+
+        attempts = settings.DB_LOCK_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_lock_error(exc):
+                    raise
+                if attempt == attempts:
+                    _count("failures")
+                    logger.error(
+                        "%s: database is locked, %d urinishdan keyin ham",
+                        func.__name__,
+                        attempt,
+                    )
+                    raise
+                _count("retries")
+                delay = settings.DB_LOCK_RETRY_BACKOFF * 2 ** (attempt - 1)
+                logger.warning(
+                    "%s: database is locked, %.3fs dan keyin qayta urinish",
+                    func.__name__,
+                    delay,
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+
+    return wrapper
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .dblocks import retry_on_lock
+from .models import (
+    AttemptResult,
+    LeaderboardEntry,
+    UserAnswer,
+    UserStats,
+    UserTestAttempt,
+    UserTestProgress,
+)
+from .packing import pack
+from .results import build_payload
+
+
+def selected_answer_ids(data, questions):
+    """POST ma'lumotidan {question_id: answer_id} - noto'g'ri qiymatlar tashlanadi"""
+    selected = {}
+    for question in questions:
+        try:
+            selected[question.id] = int(data.get(f"question_{question.id}"))
+        except (TypeError, ValueError):
+            continue
+    return selected
+
+
+@retry_on_lock
+def grade_submission(
+    user, questions, data, test=None, is_random=False, subject_id=None
+):
+    """Topshiruvni baholaydi va bitta tranzaksiyada saqlaydi.
+
+    ``questions`` - katalog savollari (xizmat qilingan tartibda). Javob
+    kalitlari snapshotdan olinadi, har bir javob o'z savoliga tegishliligi
+    tekshiriladi. Javoblar ``ATTEMPT_ANSWER_STORAGE`` ga ko'ra topshiruvning
+    o'zida blob sifatida yoki ``UserAnswer`` qatorlari (``bulk_create``)
+    bilan yoziladi.
+    So'rovlar soni savollar soniga bog'liq emas.
+    """
+    selected = selected_answer_ids(data, questions)
+
+    graded = {}
+    # Packed ko'rinish uchun: (question_id, variant harfi, to'g'rimi) berilgan tartibda
+    records = []
+    for question in questions:
+        answer_id = selected.get(question.id)
+        # Boshqa savolning javobi yuborilgan bo'lsa - javob berilmagan hisoblanadi
+        answer = next((a for a in question.answers if a.id == answer_id), None)
+        if answer is not None:
+            graded[question.id] = answer
+            records.append((question.id, answer.order, answer.is_correct))
+        else:
+            records.append((question.id, None, False))
+
+    correct_count = sum(1 for answer in graded.values() if answer.is_correct)
+    packed = settings.ATTEMPT_ANSWER_STORAGE == "packed"
+
+    with transaction.atomic():
+        attempt = UserTestAttempt.objects.create(
+            user=user,
+            test=test,
+            subject_id=test.subject_id if test is not None else subject_id,
+            total_questions=len(questions),
+            score=correct_count,
+            completed=True,
+            completed_at=timezone.now(),
+            is_random=is_random,
+            answers_packed=pack(records) if packed else None,
+        )
+        if not packed:
+            UserAnswer.objects.bulk_create(
+                [
+                    UserAnswer(
+                        attempt=attempt,
+                        question_id=question_id,
+                        selected_answer_id=answer.id,
+                        is_correct=answer.is_correct,
+                    )
+                    for question_id, answer in graded.items()
+                ]
+            )
+        AttemptResult.objects.create(
+            attempt=attempt, payload=build_payload(questions, graded)
+        )
+        if test is not None:
+            UserTestProgress.record_attempt(attempt)
+        UserStats.record_attempt(attempt)
+        LeaderboardEntry.record_attempt(attempt)
+
+    return attempt
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from test_app import dblocks
+from test_app.benchmark import (
+    Timer,
+    correct_answers,
+    create_users,
+    isolated_database,
+    seed_exam_content,
+    summarize,
+)
+
+SESSION_RE = re.compile(r'name="session" value="(\d+)"')
+RANDOM_ANSWER_RE = re.compile(r'name="(question_\d+)" value="(\d+)"')
+
+
+class Command(BaseCommand):
+    help = (
+        "Imtihon oqimini WSGI (sync ko'rinishlar, oqimlar) va ASGI (async "
+        "ko'rinishlar, AsyncClient) rejimlarida o'lchaydi va JSON hisobot beradi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode", choices=["wsgi", "asgi", "compare"], default="compare"
+        )
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument("--questions", type=int, default=10)
+
+    def handle(self, *args, **options):
+        if options["mode"] == "compare":
+            report = {mode: self._run_child(mode, options) for mode in ("wsgi", "asgi")}
+        else:
+            report = self._run(options)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _run_child(self, mode, options):
+        """Har rejim alohida jarayonda - URL lar ASYNC_EXAM_VIEWS ga qarab yuklanadi"""
+        env = dict(os.environ, ASYNC_EXAM_VIEWS="1" if mode == "asgi" else "0")
+        command = [
+            sys.executable,
+            sys.argv[0],
+            "bench_exam_views",
+            f"--mode={mode}",
+            f"--users={options['users']}",
+            f"--concurrency={options['concurrency']}",
+            f"--rounds={options['rounds']}",
+            f"--questions={options['questions']}",
+        ]
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"{mode} rejimi xato bilan tugadi:\n{result.stderr}")
+        return json.loads(result.stdout)
+
+    def _run(self, options):
+        with isolated_database():
+            [subject] = seed_exam_content(
+                subjects=1, tests=2, questions=options["questions"]
+            )
+            users = create_users(options["users"])
+            test = subject.tests.get(order=1)
+            scenario = {
+                "test_id": test.id,
+                "subject_id": subject.id,
+                "answers": correct_answers(test),
+                "rounds": options["rounds"],
+            }
+
+            dblocks.reset()
+            if options["mode"] == "wsgi":
+                timer, elapsed = self._run_wsgi(users, scenario, options["concurrency"])
+            else:
+                timer, elapsed = asyncio.run(
+                    self._run_asgi(users, scenario, options["concurrency"])
+                )
+
+        all_samples = [s for samples in timer.samples.values() for s in samples]
+        return {
+            "mode": options["mode"],
+            "engine": connection.vendor,
+            "async_views": settings.ASYNC_EXAM_VIEWS,
+            "users": options["users"],
+            "concurrency": options["concurrency"],
+            "total": summarize(all_samples, elapsed),
+            "views": timer.report(elapsed),
+            "db_locks": dblocks.snapshot(),
+        }
+
+    # WSGI: sync ko'rinishlar, har foydalanuvchi o'z oqimida
+
+    def _run_wsgi(self, users, scenario, concurrency):
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+
+        def session(client):
+            timer = Timer()
+            try:
+                for _round in range(scenario["rounds"]):
+                    self._wsgi_round(client, timer, scenario)
+            finally:
+                close_old_connections()
+            return timer
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timers = list(pool.map(session, clients))
+        elapsed = time.perf_counter() - started
+        return self._merged(timers), elapsed
+
+    def _wsgi_round(self, client, timer, scenario):
+        urls = _urls(scenario)
+        with timer.measure("take_test"):
+            _check(client.get(urls["take_test"]), 200)
+        with timer.measure("submit_test"):
+            response = _check(
+                client.post(urls["submit_test"], scenario["answers"]), 302
+            )
+        with timer.measure("test_result"):
+            _check(client.get(response["Location"]), 200)
+        with timer.measure("take_random_test"):
+            page = _check(client.get(urls["take_random_test"]), 200)
+        with timer.measure("submit_random_test"):
+            _check(client.post(urls["submit_random_test"], _random_post(page)), 302)
+
+    # ASGI: async ko'rinishlar, bitta event loop
+
+    async def _run_asgi(self, users, scenario, concurrency):
+        clients = []
+        for user in users:
+            client = AsyncClient()
+            await client.aforce_login(user)
+            clients.append(client)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def session(client):
+            timer = Timer()
+            async with semaphore:
+                for _round in range(scenario["rounds"]):
+                    await self._asgi_round(client, timer, scenario)
+            return timer
+
+        started = time.perf_counter()
+        timers = await asyncio.gather(*(session(client) for client in clients))
+        elapsed = time.perf_counter() - started
+        # sync_to_async oqimidagi ulanishlar - test bazasini o'chirishdan oldin
+        await sync_to_async(connections.close_all)()
+        return self._merged(timers), elapsed
+
+    async def _asgi_round(self, client, timer, scenario):
+        urls = _urls(scenario)
+        with timer.measure("take_test"):
+            _check(await client.get(urls["take_test"]), 200)
+        with timer.measure("submit_test"):
+            response = _check(
+                await client.post(urls["submit_test"], scenario["answers"]), 302
+            )
+        with timer.measure("test_result"):
+            _check(await client.get(response["Location"]), 200)
+        with timer.measure("take_random_test"):
+            page = _check(await client.get(urls["take_random_test"]), 200)
+        with timer.measure("submit_random_test"):
+            _check(
+                await client.post(urls["submit_random_test"], _random_post(page)),
+                302,
+            )
+
+    def _merged(self, timers):
+        merged = Timer()
+        for timer in timers:
+            merged.merge(timer)
+        return merged
+
+
+def _urls(scenario):
+    test_id, subject_id = scenario["test_id"], scenario["subject_id"]
+    return {
+        "take_test": reverse("take_test", args=[test_id]),
+        "submit_test": reverse("submit_test", args=[test_id]),
+        "take_random_test": reverse("take_random_test", args=[subject_id]),
+        "submit_random_test": reverse("submit_random_test", args=[subject_id]),
+    }
+
+
+def _random_post(response):
+    html = response.content.decode()
+    data = {"session": SESSION_RE.search(html).group(1)}
+    # Har savolning birinchi varianti
+    for name, value in RANDOM_ANSWER_RE.findall(html):
+        data.setdefault(name, value)
+    return data
+
+
+def _check(response, status):
+    if response.status_code != status:
+        raise CommandError(
+            f"{response.request['PATH_INFO']}: {response.status_code} (kutilgan {status})"
+        )
+    return response
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from test_app.models import Subject
+from test_app.thumbnails import variant_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Mavjud fan rasmlari uchun kichraytirilgan WebP/JPEG nusxalarni "
+        "yaratadi (saqlashda yaratilmagan eski yozuvlar uchun)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Nusxasi bor rasmlarni ham qayta yaratish",
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        skipped = 0
+        for subject in Subject.objects.order_by("id"):
+            source = subject.image_variants.get("source", "")
+            if not options["force"] and source == (subject.image.name or ""):
+                skipped += 1
+                continue
+            subject.refresh_image_variants()
+            subject.save(update_fields=["image_variants"])
+            built += 1
+            self.stdout.write(
+                f"  {subject.name}: {len(variant_names(subject.image_variants))} ta nusxa"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {built} ta fan rasmi qayta ishlandi, {skipped} tasi o'tkazib yuborildi"
+            )
+        )
@@ -0,0 +1,292 @@
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from test_app.catalog import bump_subject
+from test_app.packing import pack
+from test_app.models import (
+    Answer,
+    Question,
+    Subject,
+    Test,
+    UserAnswer,
+    UserProfile,
+    UserStats,
+    UserTestAttempt,
+    UserTestProgress,
+)
+
+LETTERS = "abcd"
+# Vaqt belgilari ham seed dan - natija har safar bir xil
+BASE_TIME = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sig'im testlari uchun katta sintetik ma'lumot yaratadi (UZ/RU/EN): fanlar, "
+        "testlar, savollar, foydalanuvchilar va topshiruvlar. bulk_create bilan, "
+        "partiyalab, seed bo'yicha takrorlanuvchi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", type=int, default=5)
+        parser.add_argument("--tests", type=int, default=5, help="Har fanda")
+        parser.add_argument("--questions", type=int, default=30, help="Har testda")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--attempts", type=int, default=10, help="Har foydalanuvchi uchun"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--user-batch",
+            type=int,
+            default=500,
+            help="Bitta tranzaksiyada yoziladigan foydalanuvchilar",
+        )
+        parser.add_argument("--prefix", default="gen", help="Username prefiksi")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        # Hamma uchun bitta xesh (parol: "password") - PBKDF2 bir marta
+        self.password = make_password("password")
+
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"'{options['prefix']}_' foydalanuvchilari allaqachon mavjud - "
+                "boshqa --prefix bering"
+            )
+
+        tests = self._create_content(rng, options)
+        self.stdout.write(
+            f"Kontent: {options['subjects']} fan, {len(tests)} test, "
+            f"{len(tests) * options['questions']} savol"
+        )
+
+        created = 0
+        while created < options["users"]:
+            count = min(options["user_batch"], options["users"] - created)
+            self._create_users(rng, options, tests, created, count)
+            created += count
+            self.stdout.write(f"  {created}/{options['users']} foydalanuvchi")
+
+        # bulk_create signallarni chaqirmaydi - katalog versiyalari qo'lda
+        for subject_id in {test.subject_id for test in tests}:
+            bump_subject(subject_id)
+        call_command(
+            "rebuild_leaderboards", batch_size=self.batch_size, stdout=self.stdout
+        )
+
+        self.stdout.write(self.style.SUCCESS("✅ Sintetik ma'lumotlar yaratildi"))
+
+    def _create_content(self, rng, options):
+        """Fanlar, testlar, savollar va javoblar. Testlar (subject, order) tartibida"""
+        with transaction.atomic():
+            offset = Subject.objects.count()
+            subjects = Subject.objects.bulk_create(
+                Subject(
+                    name_uz=f"Fan {offset + s}",
+                    name_ru=f"Предмет {offset + s}",
+                    name_en=f"Subject {offset + s}",
+                    description_uz=f"Sintetik fan {offset + s}",
+                    description_ru=f"Синтетический предмет {offset + s}",
+                    description_en=f"Synthetic subject {offset + s}",
+                )
+                for s in range(1, options["subjects"] + 1)
+            )
+            tests = Test.objects.bulk_create(
+                (
+                    Test(
+                        subject=subject,
+                        order=t,
+                        min_score_to_unlock=rng.choice((60, 70, 80)),
+                        name_uz=f"Test {t}",
+                        name_ru=f"Тест {t}",
+                        name_en=f"Test {t}",
+                    )
+                    for subject in subjects
+                    for t in range(1, options["tests"] + 1)
+                ),
+                batch_size=self.batch_size,
+            )
+
+            # Har bir test: [(question_id, to'g'ri javob id, noto'g'ri id lar)]
+            self.keys = {}
+            # Javob id -> variant harfi (packed saqlash uchun)
+            self.letters = {}
+            per_batch = max(1, self.batch_size // options["questions"])
+            for start in range(0, len(tests), per_batch):
+                chunk = tests[start : start + per_batch]
+                questions = Question.objects.bulk_create(
+                    (
+                        Question(
+                            test=test,
+                            order=q,
+                            question_text_uz=f"{test.order}-test, {q}-savol",
+                            question_text_ru=f"Тест {test.order}, вопрос {q}",
+                            question_text_en=f"Test {test.order}, question {q}",
+                        )
+                        for test in chunk
+                        for q in range(1, options["questions"] + 1)
+                    ),
+                    batch_size=self.batch_size,
+                )
+                correct = {question.id: rng.choice(LETTERS) for question in questions}
+                answers = Answer.objects.bulk_create(
+                    (
+                        Answer(
+                            question=question,
+                            order=letter,
+                            is_correct=letter == correct[question.id],
+                            answer_text_uz=f"Javob {letter.upper()}",
+                            answer_text_ru=f"Ответ {letter.upper()}",
+                            answer_text_en=f"Answer {letter.upper()}",
+                        )
+                        for question in questions
+                        for letter in LETTERS
+                    ),
+                    batch_size=self.batch_size,
+                )
+                by_question = {}
+                for answer in answers:
+                    by_question.setdefault(answer.question_id, []).append(answer)
+                    self.letters[answer.id] = answer.order
+                for question in questions:
+                    choices = by_question[question.id]
+                    right = next(a.id for a in choices if a.is_correct)
+                    wrong = [a.id for a in choices if not a.is_correct]
+                    self.keys.setdefault(question.test_id, []).append(
+                        (question.id, right, wrong)
+                    )
+        return tests
+
+    def _create_users(self, rng, options, tests, first_index, count):
+        """Foydalanuvchilar partiyasi va ularning topshiruvlari - bitta tranzaksiya"""
+        by_subject = {}
+        for test in tests:
+            by_subject.setdefault(test.subject_id, []).append(test)
+        subject_ids = sorted(by_subject)
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                (
+                    User(
+                        username=f"{options['prefix']}_{first_index + i}",
+                        email=f"{options['prefix']}_{first_index + i}@example.com",
+                        password=self.password,
+                    )
+                    for i in range(count)
+                ),
+                batch_size=self.batch_size,
+            )
+            UserProfile.objects.bulk_create(
+                (
+                    UserProfile(user=user, first_name="Talaba", last_name=user.username)
+                    for user in users
+                ),
+                batch_size=self.batch_size,
+            )
+
+            # Avval topshiruvlar rejasi (id lar bulk_create dan keyin ma'lum bo'ladi)
+            planned = []
+            for user in users:
+                skill = rng.uniform(0.3, 0.95)
+                position = {}
+                for n in range(options["attempts"]):
+                    subject_id = rng.choice(subject_ids)
+                    subject_tests = by_subject[subject_id]
+                    test = subject_tests[position.get(subject_id, 0)]
+                    picks = []
+                    for question_id, right, wrong in self.keys[test.id]:
+                        selected = right if rng.random() < skill else rng.choice(wrong)
+                        picks.append((question_id, selected, selected == right))
+                    score = sum(is_correct for _q, _s, is_correct in picks)
+                    passed = score * 100 >= test.min_score_to_unlock * len(picks)
+                    if passed and position.get(subject_id, 0) + 1 < len(subject_tests):
+                        position[subject_id] = position.get(subject_id, 0) + 1
+                    completed_at = BASE_TIME + timedelta(
+                        days=first_index // 100, minutes=n * 30 + rng.randrange(30)
+                    )
+                    planned.append((user, test, picks, score, passed, completed_at))
+
+            packed = settings.ATTEMPT_ANSWER_STORAGE == "packed"
+            attempts = UserTestAttempt.objects.bulk_create(
+                (
+                    UserTestAttempt(
+                        user=user,
+                        test=test,
+                        subject_id=test.subject_id,
+                        completed=True,
+                        score=score,
+                        total_questions=len(picks),
+                        completed_at=completed_at,
+                        answers_packed=pack(
+                            (question_id, self.letters[selected], is_correct)
+                            for question_id, selected, is_correct in picks
+                        )
+                        if packed
+                        else None,
+                    )
+                    for user, test, picks, score, passed, completed_at in planned
+                ),
+                batch_size=self.batch_size,
+            )
+
+            if not packed:
+                UserAnswer.objects.bulk_create(
+                    (
+                        UserAnswer(
+                            attempt=attempt,
+                            question_id=question_id,
+                            selected_answer_id=selected,
+                            is_correct=is_correct,
+                        )
+                        for attempt, (_u, _t, picks, *_rest) in zip(attempts, planned)
+                        for question_id, selected, is_correct in picks
+                    ),
+                    batch_size=self.batch_size,
+                )
+
+            self._create_derived(attempts, planned)
+
+    def _create_derived(self, attempts, planned):
+        """Progress va statistika - ``record_attempt`` bilan bir xil qoidalar"""
+        progress = {}
+        stats = {}
+        for attempt, (user, test, _picks, score, passed, _at) in zip(attempts, planned):
+            row = progress.setdefault(
+                (user.id, test.id),
+                UserTestProgress(user=user, test=test),
+            )
+            percentage = attempt.score_percentage
+            row.last_attempt = attempt
+            row.last_score = score
+            row.last_total = attempt.total_questions
+            row.best_percentage = max(row.best_percentage, percentage)
+            row.passed = passed
+
+            user_stats = stats.setdefault(user.id, UserStats(user=user))
+            user_stats.total_attempts += 1
+            user_stats.passed_attempts += int(passed)
+            user_stats.percentage_sum += percentage
+            key = str(test.subject_id)
+            total, passed_count, percentage_sum = user_stats.by_subject.get(
+                key, (0, 0, 0)
+            )
+            user_stats.by_subject[key] = [
+                total + 1,
+                passed_count + int(passed),
+                percentage_sum + percentage,
+            ]
+
+        UserTestProgress.objects.bulk_create(
+            progress.values(), batch_size=self.batch_size
+        )
+        UserStats.objects.bulk_create(stats.values(), batch_size=self.batch_size)
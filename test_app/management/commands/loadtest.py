@@ -0,0 +1,301 @@
+import http.cookiejar
+import json
+import random
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from test_app import dblocks
+from test_app.benchmark import (
+    Timer,
+    git_revision,
+    isolated_database,
+    seed_exam_content,
+    summarize,
+)
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SUBJECT_RE = re.compile(r'href="[^"]*/subject/(\d+)/"')
+TEST_RE = re.compile(r'href="[^"]*/test/(\d+)/"')
+ANSWER_RE = re.compile(r'name="(question_\d+)" value="(\d+)"')
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class InProcessSession:
+    """Django test klienti - ko'rinish shu oqimda bajariladi"""
+
+    def __init__(self):
+        self.client = Client()
+
+    def get(self, path):
+        return self._result(self.client.get(path))
+
+    def post(self, path, data):
+        return self._result(self.client.post(path, data))
+
+    def _result(self, response):
+        location = response.get("Location")
+        return response.status_code, response.content.decode(), location
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Ishlab turgan serverga HTTP orqali (cookie va CSRF bilan)"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect,
+        )
+        self.csrf_token = ""
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data):
+        data = dict(data, csrfmiddlewaretoken=self.csrf_token)
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=urllib.parse.urlencode(data).encode(),
+            headers={"Referer": self.base_url + path},
+        )
+        return self._open(request)
+
+    def _open(self, request):
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, body, location = response.status, response.read(), None
+        except urllib.error.HTTPError as exc:
+            status, body, location = exc.code, exc.read(), exc.headers.get("Location")
+        body = body.decode()
+        match = CSRF_RE.search(body)
+        if match:
+            self.csrf_token = match.group(1)
+        if location:
+            location = urllib.parse.urlsplit(location).path
+        return status, body, location
+
+
+class Command(BaseCommand):
+    help = (
+        "Imtihon kogortasini simulyatsiya qiladi: ro'yxatdan o'tish, kirish, fan, "
+        "test, topshirish, natija va profil. Har ko'rinish uchun throughput, "
+        "p50/p95/p99, SQL so'rovlar soni va lock xatolarini JSON da beradi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=50)
+        parser.add_argument(
+            "--concurrency", type=int, help="Parallel talabalar (standart: hammasi)"
+        )
+        parser.add_argument(
+            "--exams", type=int, default=1, help="Har talaba topshiradigan testlar"
+        )
+        parser.add_argument(
+            "--url",
+            help="Ishlab turgan server (masalan http://127.0.0.1:8000); "
+            "berilmasa in-process, vaqtinchalik bazada",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--questions", type=int, default=25, help="In-process: test uzunligi"
+        )
+        parser.add_argument(
+            "--fast-hashing",
+            action="store_true",
+            help="In-process: MD5 parol xeshi (PBKDF2 vaqtini o'lchovdan chiqaradi)",
+        )
+        parser.add_argument("--output", help="JSON hisobotni faylga yozish")
+        parser.add_argument(
+            "--baseline", help="Oldingi hisobot (JSON) - ko'rinishlar bo'yicha farqlar"
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"] or options["students"]
+        if options["url"]:
+            report = self._run(options, concurrency, remote=True)
+        else:
+            hashers = (
+                ["django.contrib.auth.hashers.MD5PasswordHasher"]
+                if options["fast_hashing"]
+                else settings.PASSWORD_HASHERS
+            )
+            with override_settings(PASSWORD_HASHERS=hashers), isolated_database():
+                seed_exam_content(subjects=3, tests=3, questions=options["questions"])
+                report = self._run(options, concurrency, remote=False)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                report["baseline"] = _compare(json.load(f), report)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+    def _run(self, options, concurrency, remote):
+        # Server bazasida oldingi yugurishlar bilan to'qnashmaslik uchun
+        run_id = int(time.time())
+
+        def student(index):
+            rng = random.Random(options["seed"] * 100003 + index)
+            timer = Timer(count_queries=not remote)
+            session = (
+                HttpSession(options["url"], options["timeout"])
+                if remote
+                else InProcessSession()
+            )
+            try:
+                self._student_flow(session, timer, rng, f"lt{run_id}_{index}", options)
+                return timer, None
+            except LoadTestError as exc:
+                return timer, str(exc)
+            finally:
+                if not remote:
+                    close_old_connections()
+
+        dblocks.reset()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(student, range(options["students"])))
+        elapsed = time.perf_counter() - started
+
+        timer = Timer()
+        failures = []
+        for student_timer, failure in results:
+            timer.merge(student_timer)
+            if failure:
+                failures.append(failure)
+
+        all_samples = [s for samples in timer.samples.values() for s in samples]
+        return {
+            "revision": git_revision(),
+            "timestamp": timezone.now().isoformat(),
+            "target": options["url"] or "in-process",
+            "engine": None if remote else connection.vendor,
+            "students": options["students"],
+            "concurrency": concurrency,
+            "exams_per_student": options["exams"],
+            "completed_students": options["students"] - len(failures),
+            "failures": failures[:20],
+            "total": summarize(all_samples, elapsed),
+            "views": timer.report(elapsed),
+            # Server jarayonidagi lock hisoblagichlari HTTP rejimda ko'rinmaydi
+            "db_locks": None if remote else dblocks.snapshot(),
+        }
+
+    def _student_flow(self, session, timer, rng, username, options):
+        password = "Lt-pass-12345"
+        step = _Step(session, timer)
+
+        step.get("register", reverse("register"), 200)
+        step.post(
+            "register",
+            reverse("register"),
+            {
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": password,
+                "password2": password,
+                "first_name": "Load",
+                "last_name": "Test",
+            },
+            302,
+        )
+        step.get("logout", reverse("logout"), 302)
+        step.get("login", reverse("login"), 200)
+        step.post(
+            "login",
+            reverse("login"),
+            {"username": username, "password": password},
+            302,
+        )
+        home = step.get("home", reverse("home"), 200)
+        subject_ids = SUBJECT_RE.findall(home)
+        if not subject_ids:
+            raise LoadTestError("home: fanlar topilmadi")
+
+        for _exam in range(options["exams"]):
+            subject_id = rng.choice(subject_ids)
+            page = step.get(
+                "subject_tests", reverse("subject_tests", args=[subject_id]), 200
+            )
+            test_ids = TEST_RE.findall(page)
+            if not test_ids:
+                raise LoadTestError(f"subject {subject_id}: ochiq test yo'q")
+            test_id = test_ids[0]
+
+            page = step.get("take_test", reverse("take_test", args=[test_id]), 200)
+            answers = {}
+            for name, value in ANSWER_RE.findall(page):
+                answers.setdefault(name, []).append(value)
+            data = {name: rng.choice(values) for name, values in answers.items()}
+
+            location = step.post(
+                "submit_test", reverse("submit_test", args=[test_id]), data, 302
+            )
+            step.get("test_result", location, 200)
+
+        step.get("profile", reverse("profile"), 200)
+
+
+def _compare(baseline, report):
+    """Ko'rinishlar bo'yicha p95, throughput va so'rovlar soni farqi"""
+    diff = {"revision": baseline.get("revision"), "views": {}}
+    for name, row in report["views"].items():
+        old = baseline.get("views", {}).get(name)
+        if old is None:
+            continue
+        diff["views"][name] = {
+            key: round(row[key] - old[key], 2)
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_max")
+            if key in row and key in old
+        }
+    return diff
+
+
+class _Step:
+    """Bitta so'rovni o'lchaydi va kutilgan statusni tekshiradi"""
+
+    def __init__(self, session, timer):
+        self.session = session
+        self.timer = timer
+
+    def get(self, name, path, expected):
+        return self._call(name, expected, self.session.get, path)
+
+    def post(self, name, path, data, expected):
+        return self._call(name, expected, self.session.post, path, data)
+
+    def _call(self, name, expected, method, *args):
+        with self.timer.measure(name):
+            try:
+                status, body, location = method(*args)
+            except OSError as exc:
+                status, body, location = None, str(exc), None
+        if status != expected:
+            self.timer.error(name)
+            raise LoadTestError(f"{name} {args[0]}: {status} (kutilgan {expected})")
+        return location if status == 302 else body
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from test_app.models import UserAnswer, UserTestAttempt
+from test_app.packing import pack
+
+
+class Command(BaseCommand):
+    help = (
+        "Eski topshiruvlarning UserAnswer qatorlarini answers_packed blobiga "
+        "o'tkazadi va (standart bo'yicha) qatorlarni o'chiradi. Partiyalab, "
+        "har partiya alohida tranzaksiyada - to'xtatib, qayta ishga tushirish mumkin"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--keep-rows",
+            action="store_true",
+            help="UserAnswer qatorlarini o'chirmaslik",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pending = UserTestAttempt.objects.filter(answers_packed__isnull=True)
+        packed = 0
+        deleted = 0
+        last_id = 0
+
+        while True:
+            ids = list(
+                pending.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            records = {attempt_id: [] for attempt_id in ids}
+            with transaction.atomic():
+                rows = (
+                    UserAnswer.objects.filter(attempt_id__in=ids)
+                    .order_by("attempt_id", "id")
+                    .values_list(
+                        "attempt_id",
+                        "question_id",
+                        "selected_answer__order",
+                        "is_correct",
+                    )
+                )
+                for attempt_id, question_id, letter, is_correct in rows:
+                    records[attempt_id].append((question_id, letter, is_correct))
+
+                UserTestAttempt.objects.bulk_update(
+                    [
+                        UserTestAttempt(id=attempt_id, answers_packed=pack(answers))
+                        for attempt_id, answers in records.items()
+                    ],
+                    ["answers_packed"],
+                    batch_size=batch_size,
+                )
+                if not options["keep_rows"]:
+                    deleted += UserAnswer.objects.filter(attempt_id__in=ids).delete()[0]
+
+            packed += len(ids)
+            self.stdout.write(f"  {packed} topshiruv")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {packed} ta topshiruv pack qilindi, {deleted} ta qator o'chirildi"
+            )
+        )
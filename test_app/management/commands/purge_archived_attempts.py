@@ -0,0 +1,70 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from test_app.models import AttemptResult, UserAnswer, UserStats, UserTestAttempt
+
+
+class Command(BaseCommand):
+    help = (
+        "Qayta topshirishda arxivlangan topshiruvlarni partiyalab o'chiradi "
+        "(fon vazifasi - cron). Har partiya alohida qisqa tranzaksiyada; "
+        "tegishli foydalanuvchilar statistikasi qolgan tarixdan qayta hisoblanadi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Shundan ko'p kun oldin arxivlanganlar o'chiriladi",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Partiyalar orasidagi tanaffus (soniya) - yozuvchilarga navbat",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archived = UserTestAttempt.objects.filter(archived_at__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{archived.count()} ta topshiruv o'chiriladi")
+            return
+
+        deleted = 0
+        while True:
+            rows = list(
+                archived.order_by("archived_at", "id").values_list("id", "user_id")[
+                    : options["batch_size"]
+                ]
+            )
+            if not rows:
+                break
+            ids = [attempt_id for attempt_id, _user_id in rows]
+            user_ids = {user_id for _attempt_id, user_id in rows}
+            with transaction.atomic():
+                # Bog'liq qatorlar to'g'ridan-to'g'ri DELETE bilan - collector
+                # ularni xotiraga yuklamaydi
+                UserAnswer.objects.filter(attempt_id__in=ids).delete()
+                AttemptResult.objects.filter(attempt_id__in=ids).delete()
+                UserTestAttempt.objects.filter(id__in=ids).delete()
+                # O'chirilgan topshiruvlar statistikadan ham chiqadi
+                for user in User.objects.filter(id__in=user_ids):
+                    UserStats.rebuild(user)
+            deleted += len(ids)
+            self.stdout.write(f"  {deleted} topshiruv")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {deleted} ta arxivlangan topshiruv o'chirildi")
+        )
@@ -0,0 +1,63 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from test_app.models import Subject
+
+
+def _walk(storage, directory):
+    """``directory`` ostidagi barcha fayl nomlari (rekursiv)"""
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield posixpath.join(directory, filename)
+    for child in directories:
+        yield from _walk(storage, posixpath.join(directory, child))
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan rasmlari katalogidagi hech bir yozuv havola qilmaydigan fayllarni "
+        "o'chiradi (mazmun bo'yicha saqlashda fayllar yozuvlar orasida bo'lishiladi)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=60,
+            help="Shundan yangi fayllarga tegilmaydi - saqlanayotgan yuklashlar",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        field = Subject._meta.get_field("image")
+        storage = field.storage
+        references = Subject.file_references()
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+
+        kept = 0
+        deleted = 0
+        freed = 0
+        for name in _walk(storage, field.upload_to.rstrip("/")):
+            if references[name] or storage.get_modified_time(name) > cutoff:
+                kept += 1
+                continue
+            size = storage.size(name)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {name} ({size} bayt)")
+            if not options["dry_run"]:
+                storage.delete(name)
+            deleted += 1
+            freed += size
+
+        action = "o'chiriladi" if options["dry_run"] else "o'chirildi"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {deleted} ta fayl {action} ({freed // 1024} KB), "
+                f"{kept} tasi qoldi"
+            )
+        )
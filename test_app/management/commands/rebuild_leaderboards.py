@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from test_app.models import LeaderboardEntry, UserTestAttempt
+
+
+class Command(BaseCommand):
+    help = "Reytinglarni topshiruvlar tarixidan qayta quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subject", type=int, help="Faqat shu fan (id)")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        attempts = UserTestAttempt.objects.filter(
+            completed=True, subject__isnull=False
+        )
+        entries = LeaderboardEntry.objects.all()
+        if options["subject"]:
+            attempts = attempts.filter(subject_id=options["subject"])
+            entries = entries.filter(subject_id=options["subject"])
+
+        # Har bir (fan, test, user) uchun eng yaxshi natija; tenglikda birinchisi
+        best = {}
+        rows = attempts.order_by("completed_at", "id").values_list(
+            "subject_id",
+            "test_id",
+            "user_id",
+            "score",
+            "total_questions",
+            "completed_at",
+        )
+        for subject_id, test_id, user_id, score, total, completed_at in rows.iterator(
+            chunk_size=options["batch_size"]
+        ):
+            percentage = score / total * 100 if total > 0 else 0
+            key = (subject_id, test_id, user_id)
+            if key not in best or percentage > best[key][0]:
+                best[key] = (percentage, completed_at)
+
+        with transaction.atomic():
+            entries.delete()
+            LeaderboardEntry.objects.bulk_create(
+                (
+                    LeaderboardEntry(
+                        subject_id=subject_id,
+                        test_id=test_id,
+                        user_id=user_id,
+                        best_percentage=percentage,
+                        achieved_at=achieved_at,
+                    )
+                    for (subject_id, test_id, user_id), (
+                        percentage,
+                        achieved_at,
+                    ) in best.items()
+                ),
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {len(best)} ta reyting qatori qayta qurildi")
+        )
@@ -1,4 +1,6 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from test_app.catalog import bump_subject
 from test_app.models import Subject, Test, Question, Answer
 
 
@@ -134,41 +136,59 @@ class Command(BaseCommand):
             },
         ]
 
-        for s in subjects:
-            subject = Subject.objects.create(
-                name_uz=s["name"][0],
-                name_ru=s["name"][1],
-                name_en=s["name"][2],
-            )
+        with transaction.atomic():
+            for s in subjects:
+                self._create_subject(s)
+
+        self.stdout.write(self.style.SUCCESS("✅ REAL mantiqiy testlar yaratildi!"))
 
-            for t in range(1, 6):
-                test = Test.objects.create(
-                    subject=subject,
-                    order=t,
-                    name_uz=f"{s['name'][0]} Test {t}",
-                    name_ru=f"{s['name'][1]} Тест {t}",
-                    name_en=f"{s['name'][2]} Test {t}",
-                )
+    def _create_subject(self, s):
+        """Fan kontenti - test, savol va javoblar bulk_create bilan"""
+        subject = Subject.objects.create(
+            name_uz=s["name"][0],
+            name_ru=s["name"][1],
+            name_en=s["name"][2],
+        )
 
-                for i in range(25):
-                    qdata = s["questions"][i % len(s["questions"])]
+        tests = Test.objects.bulk_create(
+            Test(
+                subject=subject,
+                order=t,
+                name_uz=f"{s['name'][0]} Test {t}",
+                name_ru=f"{s['name'][1]} Тест {t}",
+                name_en=f"{s['name'][2]} Test {t}",
+            )
+            for t in range(1, 6)
+        )
 
-                    question = Question.objects.create(
-                        test=test,
-                        order=i + 1,
-                        question_text_uz=qdata["q"][0],
-                        question_text_ru=qdata["q"][1],
-                        question_text_en=qdata["q"][2],
-                    )
+        rows = [
+            (test, i + 1, s["questions"][i % len(s["questions"])])
+            for test in tests
+            for i in range(25)
+        ]
+        questions = Question.objects.bulk_create(
+            Question(
+                test=test,
+                order=order,
+                question_text_uz=qdata["q"][0],
+                question_text_ru=qdata["q"][1],
+                question_text_en=qdata["q"][2],
+            )
+            for test, order, qdata in rows
+        )
 
-                    for idx, ans in enumerate(qdata["answers"]):
-                        Answer.objects.create(
-                            question=question,
-                            order=chr(97 + idx),
-                            is_correct=idx == qdata["correct"],
-                            answer_text_uz=ans[0],
-                            answer_text_ru=ans[1],
-                            answer_text_en=ans[2],
-                        )
+        Answer.objects.bulk_create(
+            Answer(
+                question=question,
+                order=chr(97 + idx),
+                is_correct=idx == qdata["correct"],
+                answer_text_uz=ans[0],
+                answer_text_ru=ans[1],
+                answer_text_en=ans[2],
+            )
+            for question, (_test, _order, qdata) in zip(questions, rows)
+            for idx, ans in enumerate(qdata["answers"])
+        )
 
-        self.stdout.write(self.style.SUCCESS("✅ REAL mantiqiy testlar yaratildi!"))
+        # bulk_create signal yubormaydi - katalog keshini yangilash
+        bump_subject(subject.id)
@@ -0,0 +1,68 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+
+from .catalog import request_scope
+from .serving import serve
+
+# Xeshli statik nomlar o'zgarmaydi - brauzer keshida bir yil
+STATIC_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class PrecompressedStaticMiddleware:
+    """``STATIC_URL`` ostidagi so'rovlarni sessiya/til middlewarelaridan oldin
+    ``STATIC_ROOT`` dan yuboradi.
+
+    ``Accept-Encoding`` ga qarab ``collectstatic`` yozgan ``.br`` / ``.gz``
+    nusxa tanlanadi. Manifestdagi xeshli nomlar ``immutable`` bilan bir yil
+    keshlanadi - takroriy sahifa ochilishida statik baytlar umuman so'ralmaydi.
+    Xeshsiz nomlar shartli GET (304) bilan tekshiriladi.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVE_FILES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+        # Manifest faqat collectstatic da o'zgaradi - worker qayta ishga tushadi
+        self.immutable = frozenset(
+            getattr(staticfiles_storage, "hashed_files", {}).values()
+        )
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+        path = request.path_info[len(self.prefix) :]
+        return serve(
+            request,
+            path,
+            document_root=settings.STATIC_ROOT,
+            offload_location="static/",
+            cache_max_age=STATIC_CACHE_MAX_AGE if path in self.immutable else 0,
+            precompressed=True,
+        )
+
+
+class CatalogVersionMiddleware:
+    """So'rov davomida har fan katalog versiyasi DB dan bir marta o'qiladi
+    (``catalog.request_scope``) - bir so'rovdagi ko'p murojaat bitta
+    snapshot bilan ishlaydi va har biri uchun alohida so'rov bo'lmaydi."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_scope():
+            return await self.get_response(request)
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_progress(apps, schema_editor):
+    Test = apps.get_model("test_app", "Test")
+    UserTestAttempt = apps.get_model("test_app", "UserTestAttempt")
+    UserTestProgress = apps.get_model("test_app", "UserTestProgress")
+
+    tests = {t.id: t for t in Test.objects.all()}
+    next_tests = {(t.subject_id, t.order): t.id for t in tests.values()}
+    rows = {}
+
+    attempts = UserTestAttempt.objects.filter(
+        completed=True, test__isnull=False
+    ).order_by("completed_at", "id")
+    for attempt in attempts.iterator():
+        test = tests[attempt.test_id]
+        percentage = (
+            attempt.score / attempt.total_questions * 100
+            if attempt.total_questions > 0
+            else 0
+        )
+        row = rows.setdefault(
+            (attempt.user_id, test.id),
+            UserTestProgress(
+                user_id=attempt.user_id, test_id=test.id, unlocked=test.order == 1
+            ),
+        )
+        row.last_attempt_id = attempt.id
+        row.last_score = attempt.score
+        row.last_total = attempt.total_questions
+        row.best_percentage = max(row.best_percentage, percentage)
+        row.passed = percentage >= test.min_score_to_unlock
+
+    for (user_id, test_id), row in list(rows.items()):
+        test = tests[test_id]
+        next_id = next_tests.get((test.subject_id, test.order + 1))
+        if next_id:
+            rows.setdefault(
+                (user_id, next_id),
+                UserTestProgress(user_id=user_id, test_id=next_id),
+            ).unlocked = row.passed
+
+    UserTestProgress.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0004_answer_answer_text_en_answer_answer_text_ru_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTestProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_score', models.IntegerField(default=0, verbose_name='Oxirgi ball')),
+                ('last_total', models.IntegerField(default=0, verbose_name='Savollar soni')),
+                ('best_percentage', models.FloatField(default=0, verbose_name='Eng yaxshi natija %')),
+                ('passed', models.BooleanField(default=False, verbose_name="O'tgan")),
+                ('unlocked', models.BooleanField(default=False, verbose_name='Ochiq')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_attempt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='test_app.usertestattempt')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='test_app.test', verbose_name='Test')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Test progressi',
+                'verbose_name_plural': 'Test progresslari',
+                'unique_together': {('user', 'test')},
+            },
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0005_usertestprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='random_test_stratified',
+            field=models.BooleanField(default=False, verbose_name="Random test savollari testlar bo'yicha teng"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_attempt_subject(apps, schema_editor):
+    Test = apps.get_model("test_app", "Test")
+    UserTestAttempt = apps.get_model("test_app", "UserTestAttempt")
+
+    UserTestAttempt.objects.filter(test__isnull=False).update(
+        subject_id=Subquery(
+            Test.objects.filter(id=OuterRef("test_id")).values("subject_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0006_subject_random_test_stratified'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertestattempt',
+            name='subject',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='test_app.subject', verbose_name='Fan'),
+        ),
+        migrations.CreateModel(
+            name='RandomTestSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.TextField(verbose_name='Savollar (id, vergul bilan)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('attempt', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='random_session', to='test_app.usertestattempt')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='random_test_sessions', to='test_app.subject', verbose_name='Fan')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='random_test_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Random test sessiyasi',
+                'verbose_name_plural': 'Random test sessiyalari',
+                'indexes': [models.Index(fields=['user', 'subject', 'submitted_at'], name='test_app_ra_user_id_48a45d_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_attempt_subject, migrations.RunPython.noop),
+    ]
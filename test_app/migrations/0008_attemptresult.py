@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0007_randomtestsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptResult',
+            fields=[
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result', serialize=False, to='test_app.usertestattempt')),
+                ('payload', models.JSONField()),
+            ],
+            options={
+                'verbose_name': 'Topshiruv natijasi',
+                'verbose_name_plural': 'Topshiruv natijalari',
+            },
+        ),
+    ]
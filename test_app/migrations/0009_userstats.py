@@ -0,0 +1,36 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('test_app', '0008_attemptresult'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_attempts', models.IntegerField(default=0)),
+                ('passed_attempts', models.IntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('by_subject', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Foydalanuvchi statistikasi',
+                'verbose_name_plural': 'Foydalanuvchilar statistikasi',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='usertestattempt',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='test_app_us_user_id_a29852_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0009_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_percentage', models.FloatField(verbose_name='Eng yaxshi natija %')),
+                ('achieved_at', models.DateTimeField()),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='test_app.subject')),
+                ('test', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='test_app.test')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Reyting',
+                'verbose_name_plural': 'Reytinglar',
+                'indexes': [models.Index(fields=['subject', 'test', '-best_percentage', 'achieved_at'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('test__isnull', False)), fields=('test', 'user'), name='leaderboard_unique_test_user'), models.UniqueConstraint(condition=models.Q(('test__isnull', True)), fields=('subject', 'user'), name='leaderboard_unique_random_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0010_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertestattempt',
+            name='answers_packed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0011_usertestattempt_answers_packed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertestattempt',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Arxivlangan'),
+        ),
+        migrations.AddIndex(
+            model_name='usertestattempt',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['user', 'test', '-completed_at'], name='attempt_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usertestattempt',
+            index=models.Index(condition=models.Q(('archived_at__isnull', False)), fields=['archived_at'], name='attempt_archived_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0012_usertestattempt_archived_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Rasm nusxalari'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+import copy
+
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+from test_app.storage import content_name
+
+
+def collapse_duplicates(apps, schema_editor):
+    """Fan rasmlari va nusxalarini mazmun xeshi nomiga ko'chiradi.
+
+    Bir xil mazmunli fayllar bitta faylga birlashadi; havolasiz qolgan eski
+    nusxalarni ``purge_unused_media`` tozalaydi.
+    """
+    Subject = apps.get_model("test_app", "Subject")
+    renamed = {}
+
+    def collapse(name):
+        if not name:
+            return name
+        if name not in renamed:
+            if not default_storage.exists(name):
+                renamed[name] = name
+            else:
+                with default_storage.open(name, "rb") as content:
+                    target = content_name(name, content)
+                    if target != name and not default_storage.exists(target):
+                        default_storage.save(target, content)
+                # Asl fayl o'chirilmaydi - migratsiya qaytarilsa ham yo'qolmaydi
+                renamed[name] = target
+        return renamed[name]
+
+    for subject in Subject.objects.order_by("id"):
+        image = collapse(subject.image.name)
+        variants = copy.deepcopy(subject.image_variants or {})
+        if variants.get("source"):
+            variants["source"] = image
+        for key, items in variants.items():
+            if key != "source":
+                for item in items:
+                    item["name"] = collapse(item["name"])
+        if image != subject.image.name or variants != subject.image_variants:
+            Subject.objects.filter(id=subject.id).update(
+                image=image, image_variants=variants
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("test_app", "0013_subject_image_variants"),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_duplicates, migrations.RunPython.noop),
+    ]
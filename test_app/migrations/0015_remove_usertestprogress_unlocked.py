@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0014_collapse_duplicate_subject_images'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='usertestprogress',
+            name='unlocked',
+        ),
+    ]
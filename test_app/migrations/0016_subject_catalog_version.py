@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:53
+
+import test_app.catalog
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0015_remove_usertestprogress_unlocked'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='catalog_version',
+            field=models.CharField(default=test_app.catalog.new_version, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def apply(apps, schema_editor):
+        """WAL bazaning o'zida saqlanadi - har ulanishda qayta o'rnatish shart emas"""
+        connection = schema_editor.connection
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA journal_mode={mode}")
+
+    return apply
+
+
+class Migration(migrations.Migration):
+    # journal_mode tranzaksiya ichida o'zgartirilmaydi
+    atomic = False
+
+    dependencies = [
+        ("test_app", "0016_subject_catalog_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode("WAL"), set_journal_mode("DELETE")),
+    ]
@@ -1,10 +1,43 @@
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
 from django.contrib.auth.models import User
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from .catalog import catalog, new_version
+from .packing import unpack
+from .thumbnails import build_variants, variant_names
 
 
 class Subject(models.Model):
     name = models.CharField(max_length=200, verbose_name="Fan nomi")
     image = models.ImageField(upload_to="subjects/", verbose_name="Rasm")
+    # Kichraytirilgan WebP/JPEG nusxalar va o'lchamlari (thumbnails.py)
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False, verbose_name="Rasm nusxalari"
+    )
+    # Katalog snapshoti versiyasi - kontent o'zgarganda bump_subject yangilaydi
+    catalog_version = models.CharField(
+        max_length=32, default=new_version, editable=False
+    )
     description = models.TextField(blank=True, verbose_name="Tavsif")
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -15,6 +48,9 @@ class Subject(models.Model):
     random_test_min_score = models.IntegerField(
         default=60, verbose_name="Random test minimal ball %"
     )
+    random_test_stratified = models.BooleanField(
+        default=False, verbose_name="Random test savollari testlar bo'yicha teng"
+    )
 
     class Meta:
         verbose_name = "Fan"
@@ -23,27 +59,65 @@ class Subject(models.Model):
     def __str__(self):
         return self.name
 
-    def unlocked_tests_for_user(self, user):
-        """Foydalanuvchi uchun ochilgan testlar"""
-        tests = self.tests.all().order_by("order")
-        unlocked_tests = []
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            # FileField.pre_save qiladigan ish - fayl nusxalardan oldin kerak
+            self.image.save(self.image.name, self.image.file, save=False)
+        if self.image_variants.get("source", "") != (self.image.name or ""):
+            self.refresh_image_variants()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "image_variants"}
+        super().save(*args, **kwargs)
+
+    def refresh_image_variants(self):
+        """Rasm nusxalarini qayta yaratadi, eskilarini o'chiradi (saqlamaydi)"""
+        previous = set(variant_names(self.image_variants))
+        self.image_variants = build_variants(self.image.name, self.image.storage)
+        # Bir xil rasmli fanlar nusxalarni bo'lishadi (storage.py) - faqat
+        # hech kim ishlatmaydiganlari o'chiriladi
+        stale = previous - set(variant_names(self.image_variants))
+        if stale:
+            stale -= Subject.file_references(exclude=self.pk).keys()
+        for name in stale:
+            self.image.storage.delete(name)
+
+    @classmethod
+    def file_references(cls, exclude=None):
+        """Media fayl nomi -> unga havola qilgan yozuvlar soni"""
+        subjects = cls.objects.all()
+        if exclude is not None:
+            subjects = subjects.exclude(pk=exclude)
+        references = Counter()
+        for image, variants in subjects.values_list("image", "image_variants"):
+            if image:
+                references[image] += 1
+            references.update(variant_names(variants))
+        return references
+
+    def test_states_for_user(self, user):
+        """Har bir test uchun (test, progress, ochiqmi) - progress bitta so'rovda o'qiladi"""
+        tests = list(
+            self.tests.annotate(question_count=Count("questions")).order_by("order")
+        )
+        progress = UserTestProgress.for_tests(user, tests)
+        by_order = {test.order: test for test in tests}
 
+        states = []
         for test in tests:
-            last_attempt = (
-                UserTestAttempt.objects.filter(user=user, test=test, completed=True)
-                .order_by("-completed_at")
-                .first()
+            previous = by_order.get(test.order - 1)
+            unlocked = UserTestProgress.is_unlocked(
+                test, previous, previous and progress.get(previous.id)
             )
+            states.append((test, progress.get(test.id), unlocked))
+        return states
 
-            if test.order == 1:  # Birinchi test har doim ochiq
-                unlocked_tests.append(test)
-            elif (
-                last_attempt
-                and last_attempt.score_percentage >= test.min_score_to_unlock
-            ):
-                unlocked_tests.append(test)
-
-        return unlocked_tests
+    def unlocked_tests_for_user(self, user):
+        """Foydalanuvchi uchun ochilgan testlar"""
+        return [
+            test
+            for test, _row, unlocked in self.test_states_for_user(user)
+            if unlocked
+        ]
 
 
 class Test(models.Model):
@@ -67,36 +141,36 @@ class Test(models.Model):
         return f"{self.subject.name} - {self.name}"
 
     def next_test(self):
-        """Keyingi testni qaytaradi"""
-        return Test.objects.filter(subject=self.subject, order=self.order + 1).first()
+        """Keyingi testni qaytaradi (katalog snapshotidan)"""
+        entry = catalog.test(self.id)
+        if entry is None or entry.next_test_id is None:
+            return None
+        return catalog.test(entry.next_test_id)
 
     def is_unlocked_for_user(self, user):
         """Foydalanuvchi uchun test ochiqmi"""
         if self.order == 1:
             return True
 
-        previous_test = Test.objects.filter(
-            subject=self.subject, order=self.order - 1
-        ).first()
-
-        if not previous_test:
-            return True
-
-        last_attempt = (
-            UserTestAttempt.objects.filter(
-                user=user, test=previous_test, completed=True
+        # Oldingi test va undagi natija bitta so'rovda; oldingi test yo'q
+        # bo'lsa (tartibda bo'shliq) - test ochiq
+        reached = (
+            Test.objects.filter(subject_id=self.subject_id, order=self.order - 1)
+            .annotate(
+                reached=Exists(
+                    UserTestProgress.objects.filter(
+                        UserTestProgress.reached_condition(
+                            OuterRef("min_score_to_unlock")
+                        ),
+                        user=user,
+                        test=OuterRef("pk"),
+                    )
+                )
             )
-            .order_by("-completed_at")
+            .values_list("reached", flat=True)
             .first()
         )
-
-        if (
-            last_attempt
-            and last_attempt.score_percentage >= previous_test.min_score_to_unlock
-        ):
-            return True
-
-        return False
+        return reached is None or reached
 
 
 class Question(models.Model):
@@ -116,8 +190,9 @@ class Question(models.Model):
         return f"{self.test.name} - Savol {self.order}"
 
     def correct_answer(self):
-        """To'g'ri javobni qaytaradi"""
-        return self.answers.filter(is_correct=True).first()
+        """To'g'ri javobni qaytaradi (katalog snapshotidan)"""
+        entry = catalog.question(self.id)
+        return entry.correct_answer() if entry else None
 
 
 class Answer(models.Model):
@@ -162,17 +237,46 @@ class UserTestAttempt(models.Model):
     test = models.ForeignKey(
         Test, on_delete=models.CASCADE, related_name="attempts", null=True, blank=True
     )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name="attempts",
+        null=True,
+        blank=True,
+        verbose_name="Fan",
+    )
     completed = models.BooleanField(default=False)
     score = models.IntegerField(default=0)
     total_questions = models.IntegerField(default=0)
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     is_random = models.BooleanField(default=False, verbose_name="Random test")
+    # Javoblar ixcham ko'rinishda (packing.py). None - javoblar UserAnswer
+    # qatorlarida (ATTEMPT_ANSWER_STORAGE = "rows" yoki hali pack qilinmagan)
+    answers_packed = models.BinaryField(null=True, blank=True, editable=False)
+    # Qayta topshirishda eski topshiruvlar o'chirilmaydi, arxivlanadi (tarix
+    # saqlanadi); purge_archived_attempts ularni fonda partiyalab o'chiradi
+    archived_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Arxivlangan"
+    )
 
     class Meta:
         verbose_name = "Test topshiruvi"
         verbose_name_plural = "Test topshiruvlari"
         ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["user", "-completed_at", "-id"]),
+            models.Index(
+                fields=["user", "test", "-completed_at"],
+                condition=Q(archived_at__isnull=True),
+                name="attempt_current_idx",
+            ),
+            models.Index(
+                fields=["archived_at"],
+                condition=Q(archived_at__isnull=False),
+                name="attempt_archived_idx",
+            ),
+        ]
 
     def __str__(self):
         if self.is_random:
@@ -195,6 +299,51 @@ class UserTestAttempt(models.Model):
             return self.score_percentage >= self.test.min_score_to_unlock
         return False
 
+    @classmethod
+    def current_for(cls, user, test_id):
+        """Joriy (arxivlanmagan) yakunlangan topshiruvlar, oxirgisi birinchi"""
+        return cls.objects.filter(
+            user=user,
+            test_id=test_id,
+            completed=True,
+            archived_at__isnull=True,
+        ).order_by("-completed_at")
+
+    @classmethod
+    def archive_for(cls, user, test):
+        """Qayta topshirish: joriy topshiruvlar bitta UPDATE bilan arxivlanadi"""
+        return cls.objects.filter(
+            user=user, test=test, archived_at__isnull=True
+        ).update(archived_at=timezone.now())
+
+    def answer_records(self):
+        """(question_id, selected_answer_id, is_correct) lar - berilgan tartibda.
+
+        Packed topshiruvda javob berilmagan savollar ham bor (selected None);
+        variant harfi javob id siga katalog orqali aylantiriladi.
+        """
+        if self.answers_packed is None:
+            return list(
+                self.user_answers.order_by("id").values_list(
+                    "question_id", "selected_answer_id", "is_correct"
+                )
+            )
+        records = []
+        for answer in unpack(self.answers_packed):
+            selected_id = None
+            if answer.option is not None:
+                question = catalog.question(answer.question_id)
+                selected_id = next(
+                    (
+                        option.id
+                        for option in (question.answers if question else ())
+                        if option.order == answer.option
+                    ),
+                    None,
+                )
+            records.append((answer.question_id, selected_id, answer.is_correct))
+        return records
+
     @property
     def can_retake(self):
         """Qayta topshirish mumkinmi?"""
@@ -219,3 +368,455 @@ class UserAnswer(models.Model):
 
     def __str__(self):
         return f"{self.attempt.user.username} - Savol {self.question.order}"
+
+
+class AttemptResult(models.Model):
+    """Topshiruv natijasining snapshoti (natija sahifasi shundan chiziladi)"""
+
+    attempt = models.OneToOneField(
+        UserTestAttempt,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="result",
+    )
+    payload = models.JSONField()
+
+    class Meta:
+        verbose_name = "Topshiruv natijasi"
+        verbose_name_plural = "Topshiruv natijalari"
+
+    def __str__(self):
+        return str(self.attempt_id)
+
+
+class UserTestProgress(models.Model):
+    """Foydalanuvchining test bo'yicha jamlangan holati (user/test uchun bitta qator).
+
+    Topshirish va qayta topshirish jarayonida yangilanadi, shuning uchun fan
+    sahifasi va ochilish tekshiruvlari topshiruvlar jadvalini o'qimaydi.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="test_progress"
+    )
+    test = models.ForeignKey(
+        Test, on_delete=models.CASCADE, related_name="progress", verbose_name="Test"
+    )
+    last_attempt = models.ForeignKey(
+        UserTestAttempt,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_score = models.IntegerField(default=0, verbose_name="Oxirgi ball")
+    last_total = models.IntegerField(default=0, verbose_name="Savollar soni")
+    best_percentage = models.FloatField(default=0, verbose_name="Eng yaxshi natija %")
+    passed = models.BooleanField(default=False, verbose_name="O'tgan")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Test progressi"
+        verbose_name_plural = "Test progresslari"
+        unique_together = ["user", "test"]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.test.name}"
+
+    @property
+    def attempted(self):
+        return self.last_attempt_id is not None
+
+    @property
+    def last_percentage(self):
+        """Oxirgi topshiruv foizi"""
+        if self.last_total > 0:
+            return (self.last_score / self.last_total) * 100
+        return 0
+
+    @property
+    def can_retake(self):
+        return self.attempted and not self.passed
+
+    @staticmethod
+    def reached(score, total, threshold):
+        """Oxirgi natija ``threshold`` foizdan kam emasmi (butun sonlarda)"""
+        return total > 0 and score * 100 >= threshold * total
+
+    @staticmethod
+    def reached_condition(threshold):
+        """``reached`` ning SQL sharti; ``threshold`` - son yoki ``OuterRef``"""
+        return Q(last_total__gt=0) & GreaterThanOrEqual(
+            F("last_score") * 100, threshold * F("last_total")
+        )
+
+    @classmethod
+    def is_unlocked(cls, test, previous, previous_row):
+        """Test ochiqmi - oldingi testdagi oxirgi natija uning chegarasidan
+        o'tganmi. O'qishda hisoblanadi: keyin qo'shilgan test yoki o'zgargan
+        chegara uchun ham to'g'ri"""
+        if test.order == 1 or previous is None:
+            return True
+        return previous_row is not None and cls.reached(
+            previous_row.last_score,
+            previous_row.last_total,
+            previous.min_score_to_unlock,
+        )
+
+    @classmethod
+    def for_tests(cls, user, tests):
+        """{test_id: progress} - bitta indeksli so'rov"""
+        return {
+            row.test_id: row
+            for row in cls.objects.filter(user=user, test__in=[t.id for t in tests])
+        }
+
+    @classmethod
+    def record_attempt(cls, attempt):
+        """Yakunlangan topshiruv natijasini progressga yozadi"""
+        test = attempt.test
+        passed = attempt.is_passed
+
+        with transaction.atomic():
+            row, _created = cls.objects.select_for_update().get_or_create(
+                user_id=attempt.user_id, test=test
+            )
+            row.last_attempt = attempt
+            row.last_score = attempt.score
+            row.last_total = attempt.total_questions
+            row.best_percentage = max(row.best_percentage, attempt.score_percentage)
+            row.passed = passed
+            row.save()
+        return row
+
+    @classmethod
+    def reset(cls, user, test):
+        """Qayta topshirishda oxirgi natijani tozalaydi"""
+        cls.objects.filter(user=user, test=test).update(
+            last_attempt=None,
+            last_score=0,
+            last_total=0,
+            best_percentage=0,
+            passed=False,
+        )
+
+
+class RandomTestSession(models.Model):
+    """Foydalanuvchiga berilgan random test savollari (server tomonida saqlanadi).
+
+    Topshirish faqat shu yerdagi savollar bo'yicha baholanadi, sessiya bir
+    marta ishlatiladi va yaratilgan topshiruvga bog'lanadi.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="random_test_sessions"
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name="random_test_sessions",
+        verbose_name="Fan",
+    )
+    question_ids = models.TextField(verbose_name="Savollar (id, vergul bilan)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    attempt = models.OneToOneField(
+        UserTestAttempt,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="random_session",
+    )
+
+    class Meta:
+        verbose_name = "Random test sessiyasi"
+        verbose_name_plural = "Random test sessiyalari"
+        indexes = [models.Index(fields=["user", "subject", "submitted_at"])]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.subject.name}"
+
+    @classmethod
+    def _open(cls, user, subject_id):
+        max_age = getattr(settings, "RANDOM_TEST_SESSION_MAX_AGE", 2 * 60 * 60)
+        return cls.objects.filter(
+            user=user,
+            subject_id=subject_id,
+            submitted_at__isnull=True,
+            created_at__gte=timezone.now() - timedelta(seconds=max_age),
+        ).order_by("-created_at")
+
+    @classmethod
+    def open_for(cls, user, subject_id):
+        """Foydalanuvchining hali topshirilmagan, muddati o'tmagan sessiyasi"""
+        return cls._open(user, subject_id).first()
+
+    @classmethod
+    async def aopen_for(cls, user, subject_id):
+        return await cls._open(user, subject_id).afirst()
+
+    def get_question_ids(self):
+        return [int(i) for i in self.question_ids.split(",") if i]
+
+    def set_question_ids(self, question_ids):
+        self.question_ids = ",".join(str(i) for i in question_ids)
+
+    def mark_submitted(self):
+        """Sessiyani band qiladi; ikkinchi marta topshirishda False"""
+        self.submitted_at = timezone.now()
+        return bool(
+            RandomTestSession.objects.filter(
+                id=self.id, submitted_at__isnull=True
+            ).update(submitted_at=self.submitted_at)
+        )
+
+
+class UserStats(models.Model):
+    """Foydalanuvchi statistikasi - topshirish vaqtida yangilanadi.
+
+    ``by_subject``: {subject_id: [topshiruvlar, o'tganlar, foizlar yig'indisi]}
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    total_attempts = models.IntegerField(default=0)
+    passed_attempts = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    by_subject = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Foydalanuvchi statistikasi"
+        verbose_name_plural = "Foydalanuvchilar statistikasi"
+
+    def __str__(self):
+        return str(self.user)
+
+    @property
+    def average_score(self):
+        if self.total_attempts > 0:
+            return self.percentage_sum / self.total_attempts
+        return 0
+
+    def subject_rows(self):
+        """Fanlar kesimida: (fan, topshiruvlar, o'tganlar, o'rtacha %)"""
+        rows = []
+        for subject_id, (total, passed, percentage_sum) in self.by_subject.items():
+            subject = catalog.subject(int(subject_id))
+            if subject is not None and total > 0:
+                rows.append((subject, total, passed, percentage_sum / total))
+        return sorted(rows, key=lambda row: row[0].id)
+
+    @classmethod
+    def for_user(cls, user):
+        stats = cls.objects.filter(user=user).first()
+        return stats if stats is not None else cls.rebuild(user)
+
+    @classmethod
+    def record_attempt(cls, attempt):
+        """Yangi yakunlangan topshiruvni statistikaga qo'shadi"""
+        with transaction.atomic():
+            stats = (
+                cls.objects.select_for_update().filter(user_id=attempt.user_id).first()
+            )
+            if stats is None:
+                # Birinchi qator - oldingi tarix ham (shu topshiruv bilan) sanaladi
+                return cls.rebuild(attempt.user_id)
+            passed = int(attempt.is_passed)
+            percentage = attempt.score_percentage
+            stats.total_attempts += 1
+            stats.passed_attempts += passed
+            stats.percentage_sum += percentage
+            if attempt.subject_id is not None:
+                key = str(attempt.subject_id)
+                total, passed_count, percentage_sum = stats.by_subject.get(
+                    key, (0, 0, 0)
+                )
+                stats.by_subject[key] = [
+                    total + 1,
+                    passed_count + passed,
+                    percentage_sum + percentage,
+                ]
+            stats.save()
+        return stats
+
+    @classmethod
+    def rebuild(cls, user):
+        """Statistikani topshiruvlar tarixidan (DB agregatsiyasi bilan) qayta hisoblaydi.
+
+        ``user`` - foydalanuvchi yoki uning id si.
+        """
+        user_id = getattr(user, "pk", user)
+        percentage = Case(
+            When(
+                total_questions__gt=0,
+                then=F("score") * 100.0 / F("total_questions"),
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        passed = Case(
+            When(is_random=True, percentage__gte=60, then=Value(1)),
+            When(
+                is_random=False,
+                test__isnull=False,
+                percentage__gte=F("test__min_score_to_unlock"),
+                then=Value(1),
+            ),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        rows = (
+            UserTestAttempt.objects.filter(user_id=user_id, completed=True)
+            .alias(percentage=percentage)
+            .values("subject_id")
+            .annotate(
+                total=Count("id"),
+                passed=Sum(passed),
+                percentage_sum=Sum("percentage"),
+            )
+            .order_by()
+        )
+
+        stats = cls(user_id=user_id)
+        for row in rows:
+            stats.total_attempts += row["total"]
+            stats.passed_attempts += row["passed"]
+            stats.percentage_sum += row["percentage_sum"]
+            if row["subject_id"] is not None:
+                stats.by_subject[str(row["subject_id"])] = [
+                    row["total"],
+                    row["passed"],
+                    row["percentage_sum"],
+                ]
+        stats.save()
+        return stats
+
+
+def _count(queryset):
+    """Korrelyatsiyalangan ``COUNT(*)`` subquery; bo'sh bo'lsa 0"""
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values("subject_id")
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+class LeaderboardEntry(models.Model):
+    """Reyting qatori: foydalanuvchining fan/test bo'yicha eng yaxshi natijasi.
+
+    ``test`` bo'sh bo'lsa - fanning random test reytingi. Topshirish vaqtida
+    yangilanadi; ``rebuild_leaderboards`` buyrug'i tarixdan qayta quradi.
+    Tartib: natija kamayishi bo'yicha, tenglikda kim oldin erishgan bo'lsa.
+    """
+
+    subject = models.ForeignKey(
+        Subject, on_delete=models.CASCADE, related_name="leaderboard"
+    )
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="leaderboard",
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    best_percentage = models.FloatField(verbose_name="Eng yaxshi natija %")
+    achieved_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Reyting"
+        verbose_name_plural = "Reytinglar"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["test", "user"],
+                condition=Q(test__isnull=False),
+                name="leaderboard_unique_test_user",
+            ),
+            models.UniqueConstraint(
+                fields=["subject", "user"],
+                condition=Q(test__isnull=True),
+                name="leaderboard_unique_random_user",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["subject", "test", "-best_percentage", "achieved_at"],
+                name="leaderboard_rank_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.best_percentage:.1f}%"
+
+    @classmethod
+    def board(cls, subject_id, test_id=None):
+        return cls.objects.filter(subject_id=subject_id, test_id=test_id)
+
+    @classmethod
+    def record_attempt(cls, attempt):
+        """Natija foydalanuvchining eng yaxshisi bo'lsa reytingni yangilaydi"""
+        if attempt.subject_id is None:
+            return None
+
+        percentage = attempt.score_percentage
+        with transaction.atomic():
+            entry, created = cls.objects.select_for_update().get_or_create(
+                subject_id=attempt.subject_id,
+                test_id=attempt.test_id,
+                user_id=attempt.user_id,
+                defaults={
+                    "best_percentage": percentage,
+                    "achieved_at": attempt.completed_at,
+                },
+            )
+            if not created and percentage > entry.best_percentage:
+                entry.best_percentage = percentage
+                entry.achieved_at = attempt.completed_at
+                entry.save(update_fields=["best_percentage", "achieved_at"])
+        return entry
+
+    @classmethod
+    def top(cls, subject_id, test_id=None, limit=50):
+        """Eng yaxshi ``limit`` ta natija - reyting indeksi bo'yicha"""
+        return (
+            cls.board(subject_id, test_id)
+            .select_related("user__profile")
+            .order_by("-best_percentage", "achieved_at")[:limit]
+        )
+
+    @classmethod
+    def rank_for(cls, user, subject_id, test_id=None):
+        """(o'rin, qator) yoki (None, None) - bitta so'rov.
+
+        Oldindagilar ikki oraliqda sanaladi: natijasi yuqorilar va teng
+        natijaga oldinroq erishganlar. Har biri ``leaderboard_rank_idx``
+        bo'yicha covering index oralig'i (jadvalga murojaatsiz), lekin
+        sanash baribir O(o'rin) - B-tree da oraliq uzunligi saqlanmaydi.
+        """
+        board = cls.board(subject_id, test_id)
+        entry = (
+            board.filter(user=user)
+            .annotate(
+                higher=_count(
+                    board.filter(best_percentage__gt=OuterRef("best_percentage"))
+                ),
+                earlier=_count(
+                    board.filter(
+                        best_percentage=OuterRef("best_percentage"),
+                        achieved_at__lt=OuterRef("achieved_at"),
+                    )
+                ),
+            )
+            .first()
+        )
+        if entry is None:
+            return None, None
+        return entry.higher + entry.earlier + 1, entry
@@ -0,0 +1,48 @@
+"""Topshiruv javoblarining ixcham (packed) ko'rinishi.
+
+Har savol uchun ``UserAnswer`` qatori o'rniga topshiruvning barcha javoblari
+``UserTestAttempt.answers_packed`` da bitta blob sifatida saqlanadi. Har
+savol - berilgan tartibda 5 bayt (``RECORD``)::
+
+    question_id  uint32 (little-endian)
+    flags        uint8: 0-6 bitlar - tanlangan variant indeksi (a=0 ... d=3,
+                 ``NO_OPTION`` - javob berilmagan), 7-bit - to'g'ri javob
+
+25 savollik topshiruv 125 bayt; qatorlar bilan 25 ta yozuv va indekslar.
+"""
+
+import struct
+from collections import namedtuple
+
+RECORD = struct.Struct("<IB")
+OPTION_LETTERS = "abcd"
+NO_OPTION = 0x7F
+CORRECT_BIT = 0x80
+
+PackedAnswer = namedtuple("PackedAnswer", "question_id option is_correct")
+
+
+def pack(records):
+    """``records`` - (question_id, variant harfi yoki None, to'g'rimi) lar"""
+    buffer = bytearray()
+    for question_id, option, is_correct in records:
+        flags = NO_OPTION if option is None else OPTION_LETTERS.index(option)
+        if is_correct:
+            flags |= CORRECT_BIT
+        buffer += RECORD.pack(question_id, flags)
+    return bytes(buffer)
+
+
+def unpack(blob):
+    """Blobdan ``PackedAnswer`` lar ro'yxati (berilgan tartibda)"""
+    answers = []
+    for question_id, flags in RECORD.iter_unpack(bytes(blob)):
+        index = flags & ~CORRECT_BIT
+        answers.append(
+            PackedAnswer(
+                question_id,
+                None if index == NO_OPTION else OPTION_LETTERS[index],
+                bool(flags & CORRECT_BIT),
+            )
+        )
+    return answers
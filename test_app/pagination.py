@@ -0,0 +1,127 @@
+"""Katta jadvallar uchun admin sahifalash.
+
+``UserTestAttempt`` va ``UserAnswer`` millionlab qatorgacha o'sadi; oddiy
+admin har sahifada to'liq ``COUNT(*)`` va ``OFFSET`` bilan o'qiydi - ikkalasi
+ham jadval hajmiga proporsional.
+
+- ``EstimatedCountPaginator`` - filtrsiz ro'yxatda qatorlar soni baza
+  statistikasidan (PostgreSQL ``reltuples``, SQLite ``MAX(id)``), filtr
+  bo'lsa ``COUNT_LIMIT`` gacha sanaladi.
+- ``KeysetChangeList`` - standart tartibda (``-id``) keyingi sahifa
+  ``?after=<id>`` bilan: ``WHERE id < after ORDER BY id DESC LIMIT n`` -
+  chuqurlikdan qat'i nazar indeks bo'yicha bitta o'qish.
+"""
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+KEYSET_VAR = "after"
+# Bundan kichik jadvallar aniq sanaladi
+EXACT_COUNT_THRESHOLD = 10000
+# Filtrlangan ro'yxatda sanaladigan qatorlar chegarasi
+COUNT_LIMIT = 10000
+
+
+def estimated_count(model, using="default"):
+    """Jadvaldagi qatorlarning taxminiy soni; statistika bo'lmasa None"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "sqlite":
+            # INTEGER PRIMARY KEY - rowid, MAX indeksdan o'qiladi.
+            # O'chirilgan qatorlar bo'lsa yuqoridan baho
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL: hali ANALYZE qilinmagan jadvalda -1
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Qatorlar soni taxminiy bo'lishi mumkin (``estimated`` bayrog'i)"""
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= EXACT_COUNT_THRESHOLD:
+                self.estimated = True
+                return estimate
+        count = queryset.order_by()[: COUNT_LIMIT + 1].count()
+        if count > COUNT_LIMIT:
+            self.estimated = True
+            return COUNT_LIMIT
+        return count
+
+
+class KeysetChangeList(ChangeList):
+    """Standart ``-id`` tartibida keyingi sahifaga ``?after=<id>`` bilan o'tadi.
+
+    Ustun bo'yicha saralanganda odatiy ``?p=`` sahifalash ishlaydi.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(KEYSET_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        ordering = self.queryset.query.order_by
+        self.keyset = (
+            bool(ordering) and ordering[0] in ("-id", "-pk") and not self.show_all
+        )
+        self.next_keyset_url = None
+        if not self.keyset:
+            super().get_results(request)
+            return
+
+        # ChangeList.get_results dan: sanash va bayroqlar, lekin sahifa
+        # OFFSET bilan emas - faqat keyset so'rovi bilan o'qiladi
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        result_count = paginator.count
+        show_full_result_count = self.model_admin.show_full_result_count
+        if show_full_result_count:
+            full_result_count = self.root_queryset.count()
+        else:
+            full_result_count = None
+
+        try:
+            after = int(request.GET[KEYSET_VAR])
+        except (KeyError, ValueError):
+            after = None
+        queryset = self.queryset
+        if after is not None:
+            queryset = queryset.filter(pk__lt=after)
+
+        self.result_count = result_count
+        self.show_full_result_count = show_full_result_count
+        self.show_admin_actions = not show_full_result_count or bool(
+            full_result_count
+        )
+        self.full_result_count = full_result_count
+        self.result_list = list(queryset[: self.list_per_page])
+        self.can_show_all = result_count <= self.list_max_show_all
+        self.multi_page = after is not None or result_count > self.list_per_page
+        self.paginator = paginator
+
+        if len(self.result_list) == self.list_per_page:
+            self.next_keyset_url = self.get_query_string(
+                {KEYSET_VAR: self.result_list[-1].pk}, remove=["p"]
+            )
+        self.first_page_url = self.get_query_string(remove=[KEYSET_VAR, "p"])
+        self.is_first_page = after is None
@@ -0,0 +1,68 @@
+"""Yakunlangan topshiruv natijasining snapshoti.
+
+Topshiruv o'zgarmaydi, shuning uchun natija sahifasi uchun kerak bo'lgan
+hamma narsa (savol, variantlar, tanlangan va to'g'ri javob - barcha
+tillarda) baholash vaqtida bitta JSON ga yoziladi va sahifa uni bitta
+o'qish bilan chizadi.
+"""
+
+from .catalog import CatalogAnswer, CatalogQuestion, catalog, translate
+
+
+def build_payload(questions, selected):
+    """``questions`` - katalog savollari, ``selected`` - {question_id: javob}"""
+    tests = {}
+    rows = []
+    for question in questions:
+        if question.test_id not in tests:
+            test = catalog.test(question.test_id)
+            tests[question.test_id] = list(test.names) if test else []
+        answer = selected.get(question.id)
+        rows.append(
+            [
+                question.id,
+                question.test_id,
+                list(question.texts),
+                [
+                    [option.id, option.order, option.is_correct, list(option.texts)]
+                    for option in question.answers
+                ],
+                answer.id if answer else None,
+                bool(answer and answer.is_correct),
+            ]
+        )
+    return {"tests": {str(k): v for k, v in tests.items()}, "questions": rows}
+
+
+def result_rows(payload):
+    """Shablon uchun natija qatorlari (faol tilda)"""
+    tests = payload["tests"]
+    results = []
+    for question_id, test_id, texts, options, selected_id, is_correct in payload[
+        "questions"
+    ]:
+        answers = tuple(
+            CatalogAnswer(answer_id, question_id, order, correct, tuple(answer_texts))
+            for answer_id, order, correct, answer_texts in options
+        )
+        question = CatalogQuestion(
+            question_id,
+            test_id,
+            None,
+            tuple(texts),
+            answers,
+            next((answer.id for answer in answers if answer.is_correct), None),
+        )
+        results.append(
+            {
+                "question": question,
+                "selected_answer": next(
+                    (answer for answer in answers if answer.id == selected_id), None
+                ),
+                "correct_answer": question.correct_answer(),
+                "is_correct": is_correct,
+                "all_answers": answers,
+                "test_name": translate(tests.get(str(test_id)) or ("",)),
+            }
+        )
+    return results
@@ -0,0 +1,61 @@
+"""Random test uchun savollar tanlash.
+
+Savollar to'liq yuklanmaydi: ochilgan testlar savollarining id lari kompakt
+``array`` puliga yig'iladi (fan snapshotida ochilish darajasi bo'yicha
+keshlanadi), tanlov esa indekslar oralig'idan olinadi.
+"""
+
+import random
+from array import array
+
+
+def question_pool(snapshot, tests):
+    """(ids, bo'laklar) - har bir test uchun pul ichidagi (boshi, oxiri)"""
+    key = tuple(test.id for test in tests)
+    pool = snapshot.pools.get(key)
+    if pool is None:
+        ids = array("q")
+        slices = []
+        for test in tests:
+            start = len(ids)
+            ids.extend(question.id for question in test.questions)
+            slices.append((start, len(ids)))
+        pool = (ids, tuple(slices))
+        snapshot.pools[key] = pool
+    return pool
+
+
+def _allocate(sizes, count):
+    """count ni bo'laklar hajmiga proporsional taqsimlaydi (eng katta qoldiq usuli)"""
+    total = sum(sizes)
+    quotas = [count * size / total for size in sizes]
+    counts = [int(quota) for quota in quotas]
+    by_remainder = sorted(
+        range(len(sizes)), key=lambda i: quotas[i] - counts[i], reverse=True
+    )
+    for i in by_remainder[: count - sum(counts)]:
+        counts[i] = min(counts[i] + 1, sizes[i])
+    return counts
+
+
+def sample_questions(snapshot, tests, count, stratify=False, rng=random):
+    """Ochilgan testlardan ``count`` ta tasodifiy savol (katalog yozuvlari).
+
+    ``stratify`` bo'lsa savollar har bir testdan uning hajmiga proporsional
+    olinadi.
+    """
+    ids, slices = question_pool(snapshot, tests)
+    count = min(count, len(ids))
+    if count <= 0:
+        return []
+
+    if stratify:
+        sizes = [end - start for start, end in slices]
+        indexes = []
+        for (start, end), k in zip(slices, _allocate(sizes, count)):
+            indexes.extend(rng.sample(range(start, end), k))
+        rng.shuffle(indexes)
+    else:
+        indexes = rng.sample(range(len(ids)), count)
+
+    return [snapshot.questions[ids[i]] for i in indexes]
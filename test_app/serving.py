@@ -0,0 +1,233 @@
+"""Media va statik fayllarni production rejimida yuborish.
+
+``django.views.static.serve`` faqat DEBUG uchun: har so'rovda faylni Python
+orqali o'qiydi, Range va ETag yo'q. Bu yerda:
+
+- shartli GET - ``ETag`` (hajm va mtime) va ``Last-Modified``, mos kelsa 304;
+- ``Range: bytes=...`` - bitta oraliq 206 bilan, ``If-Range`` hisobga olinadi;
+  bir nechta oraliq so'ralsa butun fayl (RFC 9110 ruxsat beradi);
+- ``FILE_OFFLOAD`` = ``x-accel-redirect`` (nginx) yoki ``x-sendfile``
+  (Apache/lighttpd) - Django faqat sarlavha qaytaradi, faylni oldidagi
+  server yuboradi;
+- aks holda ``FileResponse`` - WSGI server (gunicorn) ``wsgi.file_wrapper``
+  orqali ``sendfile()`` bilan nusxalamasdan yuboradi, Range bo'lsa ham;
+- statik fayllar ``PrecompressedStaticMiddleware`` orqali: ``collectstatic``
+  oldindan yozgan ``.br`` / ``.gz`` nusxa ``Accept-Encoding`` ga qarab.
+
+nginx uchun namuna (``FILE_OFFLOAD_PREFIX = "/internal/"``)::
+
+    location /internal/media/ { internal; alias /srv/app/media/; }
+    location /internal/static/ { internal; alias /srv/app/staticfiles/; }
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# (Content-Encoding, fayl qo'shimchasi) - afzallik tartibida
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class FileRange:
+    """Faylning ``[start, start + length)`` bo'lagi.
+
+    ``read()`` oraliq bilan cheklangan; ``fileno()`` / ``tell()`` asl faylniki -
+    gunicorn ``sendfile()`` ni shu joydan ``Content-Length`` bayt yuboradi.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.end = start + length
+
+    def read(self, size=-1):
+        remaining = self.end - self.file.tell()
+        if remaining <= 0:
+            return b""
+        return self.file.read(remaining if size < 0 else min(size, remaining))
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """``(start, length)``; sarlavha yo'q/yaroqsiz bo'lsa None, bajarib
+    bo'lmasa ``ValueError`` (416)"""
+    match = RANGE_RE.match(header or "")
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # bytes=-500 - oxirgi 500 bayt
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError(header)
+        start = max(size - suffix, 0)
+        return start, size - start
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.headers.get("If-Range")
+    if value is None:
+        return True
+    if value.startswith(('"', "W/")):
+        # If-Range faqat kuchli taqqoslash
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def accepted_encodings(header):
+    """``Accept-Encoding`` dagi q>0 bo'lgan kodlashlar"""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _stat_file(document_root, path):
+    try:
+        full_path = safe_join(document_root, path)
+        stats = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        return None, None
+    if not stat.S_ISREG(stats.st_mode):
+        return None, None
+    return full_path, stats
+
+
+@require_safe
+def serve(
+    request,
+    path,
+    document_root,
+    offload_location="",
+    cache_max_age=0,
+    precompressed=False,
+):
+    """``precompressed`` - ``Accept-Encoding`` ga qarab yonidagi ``.br`` /
+    ``.gz`` nusxa yuboriladi (``PrecompressedManifestStaticFilesStorage``)"""
+    full_path, stats = _stat_file(document_root, path)
+    if full_path is None:
+        raise Http404("Fayl topilmadi")
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if encoding or content_type is None:
+        # .gz/.br fayl o'zicha yuboriladi, brauzer ochmasligi kerak
+        content_type = "application/octet-stream"
+
+    content_encoding = None
+    if precompressed:
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding"))
+        for coding, suffix in PRECOMPRESSED:
+            if coding in accepted:
+                variant_path, variant_stats = _stat_file(document_root, path + suffix)
+                if variant_path is not None:
+                    full_path, stats = variant_path, variant_stats
+                    path += suffix
+                    content_encoding = coding
+                    break
+
+    last_modified = int(stats.st_mtime)
+    etag = f'"{stats.st_size:x}-{stats.st_mtime_ns:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = _file_response(
+            request,
+            full_path,
+            offload_location + path,
+            content_type,
+            stats,
+            etag,
+            last_modified,
+        )
+        response.headers["Last-Modified"] = http_date(last_modified)
+        response.headers["ETag"] = etag
+        if content_encoding and response.status_code in (200, 206):
+            response.headers["Content-Encoding"] = content_encoding
+    if precompressed:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    if cache_max_age:
+        # Nomi mazmundan olingan fayllar (storage.py) o'zgarmaydi
+        patch_cache_control(
+            response, public=True, max_age=cache_max_age, immutable=True
+        )
+    return response
+
+
+def _file_response(
+    request, full_path, location, content_type, stats, etag, last_modified
+):
+    offload = settings.FILE_OFFLOAD
+    if offload == "x-accel-redirect":
+        # Range va shartli so'rovlarni nginx o'zi bajaradi
+        response = HttpResponse(content_type=content_type)
+        response.headers["X-Accel-Redirect"] = quote(
+            settings.FILE_OFFLOAD_PREFIX + location
+        )
+        return response
+    if offload == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response.headers["X-Sendfile"] = full_path
+        return response
+
+    size = stats.st_size
+    byte_range = None
+    if "Range" in request.headers and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+    file = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            FileRange(file, start, length), content_type=content_type, status=206
+        )
+        response.headers["Content-Length"] = length
+        end = start + length - 1
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
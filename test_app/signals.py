@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_subject
+from .models import Answer, Question, Subject, Test
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    bump_subject(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Test)
+def test_changed(sender, instance, **kwargs):
+    bump_subject(instance.subject_id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    subject_id = (
+        Test.objects.filter(id=instance.test_id)
+        .values_list("subject_id", flat=True)
+        .first()
+    )
+    if subject_id is not None:
+        bump_subject(subject_id)
+
+
+@receiver([post_save, post_delete], sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    subject_id = (
+        Question.objects.filter(id=instance.question_id)
+        .values_list("test__subject_id", flat=True)
+        .first()
+    )
+    if subject_id is not None:
+        bump_subject(subject_id)
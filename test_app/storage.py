@@ -0,0 +1,111 @@
+"""Mazmun bo'yicha nomlanadigan saqlash: media va statik fayllar.
+
+Fayl nomi yuklangan nomdan emas, mazmunning SHA-256 xeshidan olinadi:
+``subjects/1.jpg`` -> ``subjects/3f2a...e1.jpg``. Bir xil rasm qayta
+yuklansa yoki ``0003_create_sample_data`` qayta ishlasa mavjud fayl qayta
+ishlatiladi - diskda har bir noyob rasm bitta.
+
+Fayl bir nechta yozuvga tegishli bo'lishi mumkin, shuning uchun yozuv
+o'chirilganda yoki rasm almashganda fayl darhol o'chirilmaydi; havolasiz
+fayllarni ``purge_unused_media`` buyrug'i tozalaydi.
+
+``PrecompressedManifestStaticFilesStorage`` - ``collectstatic`` da xeshli
+nomlar (``css/styles.3f2a1b.css``) va ularning yonida ``.gz`` hamda
+(``brotli`` o'rnatilgan bo'lsa) ``.br`` nusxalar yoziladi. Ularni
+``PrecompressedStaticMiddleware`` yuboradi.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import posixpath
+import uuid
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # requirements.txt da bor; o'rnatilmagan bo'lsa faqat .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 128 bit - to'qnashuv amalda imkonsiz, nom esa qisqa (max_length=100)
+HASH_LENGTH = 32
+
+
+def content_name(name, content):
+    """Mazmun xeshidan olingan nom; katalog va kengaytma saqlanadi"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    directory, filename = posixpath.split(name.replace("\\", "/"))
+    extension = os.path.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest.hexdigest()[:HASH_LENGTH] + extension)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        return super().save(content_name(name, content), content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # Nom mazmundan olingan - band bo'lsa o'sha fayl qayta ishlatiladi
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        # Vaqtinchalik nomga yozib, atomar almashtiriladi - bir xil faylni
+        # parallel yuklash yarim yozilgan faylni ko'rsatmaydi
+        temporary = super()._save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+# Matnli formatlar; rasmlar va shriftlar allaqachon siqilgan
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt")
+# Bundan kichik fayllarda siqish foyda bermaydi
+MIN_COMPRESS_SIZE = 256
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # collectstatic qilinmagan muhitda (testlar, DEBUG) asl nom qaytadi
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if not dry_run:
+            if brotli is None:
+                logger.warning(
+                    "brotli o'rnatilmagan - faqat .gz nusxalar yoziladi "
+                    "(pip install -r requirements.txt)"
+                )
+            # Oxirgi xeshli nomlar - CSS ichidagi url() lar almashtirilgandan keyin
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
@@ -1,3 +1,1639 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import os
+import random
+import re
+import tempfile
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import Http404
+from django.templatetags.static import static
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from test_app import dblocks, storage
+from test_app.benchmark import correct_answers, create_users, seed_exam_content
+from test_app.catalog import SubjectSnapshot, catalog
+from test_app.grading import grade_submission
+from test_app.models import (
+    Answer,
+    AttemptResult,
+    LeaderboardEntry,
+    Question,
+    RandomTestSession,
+    Subject,
+    Test,
+    UserProfile,
+    UserStats,
+    UserTestAttempt,
+    UserTestProgress,
+)
+from test_app.question_io import ImportInterrupted, import_questions
+from test_app.sampling import _allocate, sample_questions
+from test_app.serving import serve
+from test_app.thumbnails import variant_names
+
+# Fikstura o'lchamlari: testlar soni, test uzunligi, topshiruvlar soni.
+# So'rovlar soni bu o'lchamlarga bog'liq bo'lmasligi kerak.
+FIXTURE_SIZES = {
+    "small": {"tests": 2, "questions": 3, "attempts": 1},
+    "medium": {"tests": 4, "questions": 10, "attempts": 6},
+    "large": {"tests": 6, "questions": 25, "attempts": 25},
+}
+
+_PROJECT_DIR = os.path.join(str(settings.BASE_DIR), "")
+# SQL ni o'zi emas, faqat kuzatadigan modullar
+_SKIP_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(_PROJECT_DIR, "test_app", "dblocks.py"),
+    os.path.join(_PROJECT_DIR, "manage.py"),
+}
+_DJANGO_RE = re.compile(r"django/(?!db/|test/|core/handlers/|utils/deprecation).*")
+
+
+def _call_site():
+    """So'rovni yuborgan eng ichki loyiha kodi (fayl:qator funksiya).
+
+    Loyiha kodi topilmasa (middleware, sessiya) - ORM dan tashqaridagi eng
+    ichki Django freymi.
+    """
+    fallback = "<django>"
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_PROJECT_DIR) and filename not in _SKIP_FILES:
+            path = os.path.relpath(filename, _PROJECT_DIR)
+            return f"{path}:{frame.lineno} {frame.name}"
+        match = _DJANGO_RE.search(filename)
+        if match and fallback == "<django>":
+            fallback = f"{match.group(0)}:{frame.lineno} {frame.name}"
+    return fallback
+
+
+def _report(executed):
+    """So'rovlar chaqiruv joyi bo'yicha guruhlangan, ko'pi birinchi"""
+    by_site = {}
+    for site, sql in executed:
+        by_site.setdefault(site, []).append(sql)
+    lines = []
+    for site, queries in sorted(by_site.items(), key=lambda item: -len(item[1])):
+        lines.append(f"  {len(queries)} x {site}")
+        for sql, count in Counter(queries).most_common(3):
+            lines.append(f"      [{count}] {sql[:300]}")
+    return "\n".join(lines)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ExamTestCase(TestCase):
+    """Toza katalog va kesh bilan boshlanadi.
+
+    ``content`` - ``seed_exam_content`` argumentlari; berilsa yaratilgan
+    fanlar ``self.subjects`` da.
+    """
+
+    content = None
+
+    def setUp(self):
+        # Katalog snapshotlari jarayon ichida - testlar orasida tozalanadi
+        cache.clear()
+        catalog.clear()
+        self.subjects = seed_exam_content(**self.content) if self.content else []
+
+
+class QueryBudgetTestCase(ExamTestCase):
+    """Har bir sahifa uchun o'zgarmas so'rovlar budjeti.
+
+    Har sahifa bir necha o'lchamdagi fiksturada tekshiriladi; budjetdan
+    oshsa xato xabarida SQL chaqiruv joylari bo'yicha chiqariladi.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label):
+        executed = []
+
+        def capture(execute, sql, params, many, context):
+            executed.append((_call_site(), sql))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            yield executed
+        if len(executed) > budget:
+            self.fail(
+                f"{label}: {len(executed)} ta so'rov (budjet {budget})\n"
+                + _report(executed)
+            )
+
+    def build_fixture(self, tests, questions, attempts):
+        """Fan, talaba (``attempts`` ta oddiy va random topshiruv tarixi) va
+        reyting uchun boshqalar"""
+        [subject] = seed_exam_content(subjects=1, tests=tests, questions=questions)
+        first, second = subject.tests.order_by("order")[:2]
+        entry = catalog.test(first.id)
+        answers = correct_answers(first)
+
+        others = create_users(attempts, prefix=f"other{subject.id}_")
+        for user in others:
+            grade_submission(user, entry.questions, answers, test=first)
+
+        student = User.objects.create_user(f"student{subject.id}", password="x")
+        UserProfile.objects.create(user=student, first_name="A", last_name="B")
+        for _ in range(attempts):
+            attempt = grade_submission(student, entry.questions, answers, test=first)
+            random_attempt = grade_submission(
+                student,
+                entry.questions,
+                answers,
+                is_random=True,
+                subject_id=subject.id,
+            )
+            # Topshirilgan random sessiya - admin ro'yxati uchun
+            session = RandomTestSession(
+                user=student,
+                subject=subject,
+                submitted_at=random_attempt.completed_at,
+                attempt=random_attempt,
+            )
+            session.set_question_ids(question.id for question in entry.questions)
+            session.save()
+        # Ikkinchi testdan o'ta olmagan - qayta topshirish mumkin
+        grade_submission(student, catalog.test(second.id).questions, {}, test=second)
+
+        return {
+            "subject": subject,
+            "first": first,
+            "second": second,
+            "answers": answers,
+            "student": student,
+            "attempt": attempt,
+            "random_attempt": random_attempt,
+        }
+
+    def check_budget(
+        self,
+        name,
+        budget,
+        url_for,
+        method="get",
+        data_for=None,
+        warm_for=None,
+        anonymous=False,
+        constant=False,
+    ):
+        """Har o'lchamdagi fiksturada ``name`` sahifasi budjetga sig'ishi kerak.
+
+        Avval ``warm_for`` (yoki shu sahifa) ochiladi - katalog va sessiya
+        keshlari qizigan holat o'lchanadi. ``constant`` - so'rovlar soni
+        barcha o'lchamlarda aynan bir xil bo'lishi kerak.
+        """
+        counts = {}
+        for size, params in FIXTURE_SIZES.items():
+            with self.subTest(size=size):
+                fixture = self.build_fixture(**params)
+                if anonymous:
+                    self.client.logout()
+                else:
+                    self.client.force_login(fixture["student"])
+                url = url_for(fixture)
+                data = data_for(fixture) if data_for else {}
+                self.client.get(warm_for(fixture) if warm_for else url)
+                with self.assertQueryBudget(budget, f"{name} [{size}]") as executed:
+                    response = getattr(self.client, method)(url, data)
+                self.assertLess(response.status_code, 400, f"{name} [{size}]")
+                counts[size] = len(executed)
+        if constant:
+            self.assertQueryCountConstant(name, counts)
+
+    def assertQueryCountConstant(self, name, counts):
+        self.assertEqual(
+            len(set(counts.values())), 1, f"{name}: fikstura o'lchamiga bog'liq {counts}"
+        )
+
+
+class ViewQueryBudgetTests(QueryBudgetTestCase):
+    def test_home(self):
+        self.check_budget("home", 3, lambda f: reverse("home"))
+
+    def test_subject_tests(self):
+        self.check_budget(
+            "subject_tests",
+            5,
+            lambda f: reverse("subject_tests", args=[f["subject"].id]),
+        )
+
+    def test_subject_leaderboard(self):
+        self.check_budget(
+            "subject_leaderboard",
+            5,
+            lambda f: reverse("subject_leaderboard", args=[f["subject"].id])
+            + f"?test={f['first'].id}",
+        )
+
+    def test_take_test(self):
+        self.check_budget(
+            "take_test",
+            4,
+            lambda f: reverse("take_test", args=[f["first"].id]),
+        )
+
+    def test_submit_test(self):
+        self.check_budget(
+            "submit_test",
+            19,
+            lambda f: reverse("submit_test", args=[f["first"].id]),
+            method="post",
+            data_for=lambda f: f["answers"],
+            warm_for=lambda f: reverse("take_test", args=[f["first"].id]),
+            constant=True,
+        )
+
+    def test_retake_test(self):
+        self.check_budget(
+            "retake_test",
+            # Arxivlash va natijani tozalash bitta tranzaksiyada (+2 SAVEPOINT)
+            9,
+            lambda f: reverse("retake_test", args=[f["second"].id]),
+            method="post",
+            warm_for=lambda f: reverse("take_test", args=[f["second"].id]),
+        )
+
+    def test_test_result(self):
+        self.check_budget(
+            "test_result",
+            3,
+            lambda f: reverse("test_result", args=[f["attempt"].id]),
+        )
+
+    def test_profile(self):
+        self.check_budget("profile", 6, lambda f: reverse("profile"))
+
+    def test_take_random_test(self):
+        self.check_budget(
+            "take_random_test",
+            5,
+            lambda f: reverse("take_random_test", args=[f["subject"].id]),
+        )
+
+    def test_submit_random_test(self):
+        counts = {}
+        for size, params in FIXTURE_SIZES.items():
+            with self.subTest(size=size):
+                fixture = self.build_fixture(**params)
+                subject_id = fixture["subject"].id
+                self.client.force_login(fixture["student"])
+                page = self.client.get(reverse("take_random_test", args=[subject_id]))
+                session = page.context["session"]
+                data = {"session": session.id}
+                for question in page.context["questions"]:
+                    data[f"question_{question.id}"] = question.answers[0].id
+                with self.assertQueryBudget(
+                    20, f"submit_random_test [{size}]"
+                ) as executed:
+                    response = self.client.post(
+                        reverse("submit_random_test", args=[subject_id]), data
+                    )
+                self.assertEqual(response.status_code, 302)
+                counts[size] = len(executed)
+        self.assertQueryCountConstant("submit_random_test", counts)
+
+    def test_random_test_result(self):
+        self.check_budget(
+            "random_test_result",
+            3,
+            lambda f: reverse("random_test_result", args=[f["random_attempt"].id]),
+        )
+
+    def test_api(self):
+        self.check_budget("api_subjects", 3, lambda f: reverse("api_subjects"))
+        # Ikkinchi test - ochilganlik tekshiruvi ham o'lchanadi
+        self.check_budget(
+            "api_test", 4, lambda f: reverse("api_test", args=[f["second"].id])
+        )
+
+    def test_auth_pages(self):
+        self.check_budget("login", 0, lambda f: reverse("login"), anonymous=True)
+        self.check_budget(
+            "register", 0, lambda f: reverse("register"), anonymous=True
+        )
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    """Admin ro'yxatlari - qatorlar soniga bog'liq bo'lmagan budjet"""
+
+    def check_changelist(self, model, budget):
+        for size, params in FIXTURE_SIZES.items():
+            with self.subTest(size=size):
+                self.build_fixture(**params)
+                admin_user = User.objects.create_superuser(
+                    f"admin_{model}_{size}", password="x"
+                )
+                self.client.force_login(admin_user)
+                url = reverse(f"admin:test_app_{model}_changelist")
+                self.client.get(url)
+                with self.assertQueryBudget(budget, f"admin {model} [{size}]"):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_subject_changelist(self):
+        self.check_changelist("subject", 5)
+
+    def test_test_changelist(self):
+        self.check_changelist("test", 6)
+
+    def test_question_changelist(self):
+        self.check_changelist("question", 7)
+
+    def test_answer_changelist(self):
+        self.check_changelist("answer", 6)
+
+    def test_usertestattempt_changelist(self):
+        self.check_changelist("usertestattempt", 6)
+
+    def test_useranswer_changelist(self):
+        self.check_changelist("useranswer", 5)
+
+    def test_userprofile_changelist(self):
+        self.check_changelist("userprofile", 5)
+
+    def test_usertestprogress_changelist(self):
+        self.check_changelist("usertestprogress", 6)
+
+    def test_randomtestsession_changelist(self):
+        self.check_changelist("randomtestsession", 6)
+
+    def test_leaderboardentry_changelist(self):
+        self.check_changelist("leaderboardentry", 6)
+
+    # Keyset sahifalash eski (qator ko'rinishidagi) javoblar jadvalida
+    @override_settings(ATTEMPT_ANSWER_STORAGE="rows")
+    def test_keyset_pagination(self):
+        self.build_fixture(**FIXTURE_SIZES["large"])
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+        url = reverse("admin:test_app_useranswer_changelist")
+
+        first = self.client.get(url).context["cl"]
+        self.assertTrue(first.keyset)
+        ids = [answer.id for answer in first.result_list]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(first.next_keyset_url, f"?after={ids[-1]}")
+
+        self.client.get(url + first.next_keyset_url)
+        with self.assertQueryBudget(5, "admin useranswer [after]") as executed:
+            second = self.client.get(url + first.next_keyset_url).context["cl"]
+        # Sahifa faqat keyset bilan o'qiladi - OFFSET so'rovi yo'q
+        pages = [
+            sql
+            for _site, sql in executed
+            if sql.startswith('SELECT "test_app_useranswer"."id"')
+        ]
+        self.assertEqual(len(pages), 1, pages)
+        self.assertIn('"test_app_useranswer"."id" < ', pages[0])
+        self.assertNotIn("OFFSET", pages[0])
+        self.assertLess(second.result_list[0].id, ids[-1])
+        self.assertEqual(len(second.result_list), first.list_per_page)
+
+        # Ustun bo'yicha saralanganda odatiy sahifalash
+        sorted_cl = self.client.get(url + "?o=4").context["cl"]
+        self.assertFalse(sorted_cl.keyset)
+
+    def test_attempt_export_streams(self):
+        self.build_fixture(**FIXTURE_SIZES["large"])
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+        ids = list(UserTestAttempt.objects.values_list("id", flat=True))
+        response = self.client.post(
+            reverse("admin:test_app_usertestattempt_changelist"),
+            {"action": "export_attempts", "_selected_action": ids},
+        )
+        self.assertTrue(response.streaming)
+        # Topshiruvlar soniga bog'liq emas - bitta bo'laklangan so'rov
+        with self.assertNumQueries(1):
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), len(ids) + 1)
+        self.assertTrue(lines[0].startswith("Foydalanuvchi,Fan,Test"))
+
+
+class QuestionImportTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 2}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.test = subject.tests.get()
+        admin_user = User.objects.create_superuser("importer", password="x")
+        self.client.force_login(admin_user)
+
+    def upload(self, content):
+        return self.client.post(
+            reverse("admin:test_app_question_import"),
+            {
+                "test": self.test.id,
+                "questions_file": SimpleUploadedFile(
+                    "questions.csv", content.encode("utf-8-sig")
+                ),
+            },
+        )
+
+    def test_import_with_header(self):
+        response = self.upload(
+            "question_uz,question_ru,a_uz,a_ru,b_uz,b_ru,c_uz,correct\n"
+            "2+2?,2+2?,4,4,5,5,,a\n"
+            ",Пусто,1,1,2,2,,a\n"
+            "3+3?,,6,,7,,8,c\n"
+            "Bir javob,,1,,,,,a\n"
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.context["result"]
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _error in result.errors], [3, 5])
+
+        question = self.test.questions.get(question_text_uz="2+2?")
+        self.assertEqual(question.order, 3)
+        self.assertEqual(question.question_text_ru, "2+2?")
+        answers = list(question.answers.order_by("order"))
+        self.assertEqual([a.order for a in answers], ["a", "b"])
+        self.assertEqual([a.answer_text_ru for a in answers], ["4", "5"])
+        self.assertTrue(answers[0].is_correct)
+        # bulk_create signal yubormaydi - katalog versiyasi qo'lda yangilanadi
+        self.assertEqual(len(catalog.test(self.test.id).questions), 4)
+
+    def test_import_positional(self):
+        response = self.upload("Import 1,A,B,C,D,b\nImport 2,A,B,C,D,x\n")
+        result = response.context["result"]
+        self.assertEqual((result.created, result.error_count), (1, 1))
+        question = self.test.questions.get(question_text_uz="Import 1")
+        self.assertEqual(question.answers.get(is_correct=True).order, "b")
+
+    def test_invalid_encoding(self):
+        response = self.client.post(
+            reverse("admin:test_app_question_import"),
+            {
+                "test": self.test.id,
+                "questions_file": SimpleUploadedFile("q.csv", b"\xff\xfeS\x00"),
+            },
+        )
+        self.assertIsNone(response.context["result"])
+        self.assertTrue(response.context["form"].errors)
+        self.assertEqual(self.test.questions.count(), 2)
+
+    def test_batches_commit_separately(self):
+        # 2-partiyadan keyin fayl buziladi - oldingi partiyalar saqlanadi
+        def lines():
+            for number in range(5):
+                yield f"Savol {number},A,B,C,D,a\n"
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+        with self.assertRaises(ImportInterrupted) as caught:
+            import_questions(self.test, lines(), batch_size=2)
+        self.assertIsInstance(caught.exception.__cause__, UnicodeDecodeError)
+        self.assertEqual(caught.exception.created, 4)
+        self.assertEqual(self.test.questions.count(), 6)
+        self.assertEqual(len(catalog.test(self.test.id).questions), 6)
+
+    def export(self, action):
+        return b"".join(self.export_response(action).streaming_content).decode()
+
+    def export_response(self, action):
+        return self.client.post(
+            reverse("admin:test_app_question_changelist"),
+            {
+                "action": action,
+                "_selected_action": self.test.questions.values_list("id", flat=True),
+            },
+        )
+
+    def test_export_round_trip(self):
+        self.test.questions.update(question_text_ru="Вопрос")
+        expected = list(
+            self.test.questions.values_list(
+                "order", "question_text_uz", "question_text_ru", "question_text_en"
+            )
+        )
+        for order, (action, name) in enumerate(
+            [
+                ("export_questions", "questions.csv"),
+                ("export_questions_jsonl", "questions.jsonl"),
+            ],
+            start=2,
+        ):
+            with self.subTest(action=action):
+                content = self.export(action)
+                target = self.test.subject.tests.create(name=action, order=order)
+                response = self.client.post(
+                    reverse("admin:test_app_question_import"),
+                    {
+                        "test": target.id,
+                        "questions_file": SimpleUploadedFile(
+                            name, content.encode()
+                        ),
+                    },
+                )
+                self.assertEqual(response.context["result"].error_count, 0)
+                self.assertEqual(
+                    list(
+                        target.questions.values_list(
+                            "order",
+                            "question_text_uz",
+                            "question_text_ru",
+                            "question_text_en",
+                        )
+                    ),
+                    expected,
+                )
+                self.assertEqual(
+                    target.questions.filter(
+                        answers__is_correct=True, answers__order="a"
+                    ).count(),
+                    len(expected),
+                )
+
+    def test_export_queries(self):
+        # Savollar soniga bog'liq emas: bo'lak + javoblar prefetch
+        response = self.export_response("export_questions")
+        with self.assertNumQueries(2) as queries:
+            b"".join(response.streaming_content)
+        # Changelist dagi Count("answers") annotatsiyasi eksportga o'tmaydi
+        for query in queries.captured_queries:
+            self.assertNotIn("GROUP BY", query["sql"])
+
+    def test_export_select_across(self):
+        self.test.subject.tests.create(name="Boshqa", order=2).questions.create(
+            question_text="Filtrdan tashqari", order=1
+        )
+        response = self.client.post(
+            reverse("admin:test_app_question_changelist")
+            + f"?test__subject__id__exact={self.test.subject_id}&test={self.test.id}",
+            {
+                "action": "export_questions",
+                "select_across": "1",
+                "_selected_action": self.test.questions.values_list("id", flat=True)[
+                    :1
+                ],
+            },
+        )
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(content.count("\r\n"), self.test.questions.count() + 1)
+        self.assertNotIn("Filtrdan tashqari", content)
+
+
+class GradingTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 3}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.test = subject.tests.get()
+        self.questions = catalog.test(self.test.id).questions
+        self.user = User.objects.create_user("baholanuvchi", password="x")
+        UserProfile.objects.create(user=self.user, first_name="A", last_name="B")
+        self.client.force_login(self.user)
+        first, second, _third = self.questions
+        # 1-savolga o'zining to'g'ri javobi, 2-savolga 1-savolning to'g'ri javobi
+        self.own = first.correct_answer()
+        self.data = {
+            f"question_{first.id}": self.own.id,
+            f"question_{second.id}": self.own.id,
+        }
+
+    def submit(self):
+        response = self.client.post(
+            reverse("submit_test", args=[self.test.id]), self.data
+        )
+        self.assertEqual(response.status_code, 302)
+        return UserTestAttempt.objects.get(user=self.user)
+
+    def test_foreign_answer_is_ignored(self):
+        first, second, third = self.questions
+        expected = [
+            (first.id, self.own.id, True),
+            (second.id, None, False),
+            (third.id, None, False),
+        ]
+        for answer_storage in ("packed", "rows"):
+            with self.subTest(storage=answer_storage):
+                UserTestAttempt.objects.filter(user=self.user).delete()
+                with override_settings(ATTEMPT_ANSWER_STORAGE=answer_storage):
+                    attempt = self.submit()
+                self.assertEqual((attempt.score, attempt.total_questions), (1, 3))
+                if answer_storage == "rows":
+                    self.assertEqual(
+                        list(
+                            attempt.user_answers.values_list(
+                                "question_id", "selected_answer_id", "is_correct"
+                            )
+                        ),
+                        expected[:1],
+                    )
+                else:
+                    self.assertFalse(attempt.user_answers.exists())
+                    self.assertEqual(attempt.answer_records(), expected)
+
+    def test_writes_are_atomic(self):
+        with mock.patch.object(
+            LeaderboardEntry, "record_attempt", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.submit()
+        self.assertFalse(UserTestAttempt.objects.filter(user=self.user).exists())
+        self.assertFalse(AttemptResult.objects.exists())
+        self.assertFalse(UserTestProgress.objects.filter(user=self.user).exists())
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+
+
+class ResultSnapshotTests(ExamTestCase):
+    """Natija sahifasi baholash vaqtidagi snapshotdan chiziladi"""
+
+    content = {"subjects": 1, "tests": 1, "questions": 3}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.test = subject.tests.get()
+        self.questions = catalog.test(self.test.id).questions
+        self.user = User.objects.create_user("natija", password="x")
+        UserProfile.objects.create(user=self.user, first_name="A", last_name="B")
+        self.client.force_login(self.user)
+
+    def test_payload_contents(self):
+        first, second, _third = self.questions
+        wrong = next(answer for answer in second.answers if not answer.is_correct)
+        selected = {first.id: first.correct_answer().id, second.id: wrong.id}
+        self.client.post(
+            reverse("submit_test", args=[self.test.id]),
+            {f"question_{k}": v for k, v in selected.items()},
+        )
+        attempt = UserTestAttempt.objects.get(user=self.user)
+        payload = attempt.result.payload
+        names = list(catalog.test(self.test.id).names)
+        self.assertEqual(payload["tests"], {str(self.test.id): names})
+        self.assertEqual(
+            payload["questions"],
+            [
+                [
+                    question.id,
+                    self.test.id,
+                    list(question.texts),
+                    [
+                        [answer.id, answer.order, answer.is_correct, list(answer.texts)]
+                        for answer in question.answers
+                    ],
+                    selected.get(question.id),
+                    question.id == first.id,
+                ]
+                for question in self.questions
+            ],
+        )
+
+    def test_later_edits_do_not_change_result(self):
+        first = self.questions[0]
+        self.client.post(
+            reverse("submit_test", args=[self.test.id]),
+            {f"question_{first.id}": first.correct_answer().id},
+        )
+        attempt = UserTestAttempt.objects.get(user=self.user)
+        payload = attempt.result.payload
+        old_text = Question.objects.get(pk=first.id).question_text
+
+        question = Question.objects.get(pk=first.id)
+        question.question_text = "Tahrirlangan savol matni"
+        question.save()
+        self.assertEqual(
+            catalog.question(first.id).question_text, "Tahrirlangan savol matni"
+        )
+
+        response = self.client.get(reverse("test_result", args=[attempt.id]))
+        self.assertContains(response, old_text)
+        self.assertNotContains(response, "Tahrirlangan savol matni")
+        self.assertEqual(
+            response.context["results"][0]["question"].question_text, old_text
+        )
+        attempt.result.refresh_from_db()
+        self.assertEqual(attempt.result.payload, payload)
+
+
+class RandomTestSessionTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 2, "questions": 6}
+
+    def setUp(self):
+        super().setUp()
+        [self.subject] = self.subjects
+        # Faqat 1-test ochiq - 2-test savollari sessiyaga tushmaydi
+        self.first, self.second = self.subject.tests.order_by("order")
+        self.user = User.objects.create_user("tasodifiy", password="x")
+        UserProfile.objects.create(user=self.user, first_name="A", last_name="B")
+        self.client.force_login(self.user)
+        page = self.client.get(reverse("take_random_test", args=[self.subject.id]))
+        self.session = page.context["session"]
+        self.question_ids = self.session.get_question_ids()
+
+    def submit(self, answers=None):
+        data = {"session": self.session.id}
+        for question_id in self.question_ids:
+            data[f"question_{question_id}"] = catalog.question(
+                question_id
+            ).correct_answer_id
+        data.update(answers or {})
+        return self.client.post(
+            reverse("submit_random_test", args=[self.subject.id]), data
+        )
+
+    def attempts(self):
+        return UserTestAttempt.objects.filter(user=self.user, is_random=True)
+
+    def test_second_submit_is_rejected(self):
+        response = self.submit()
+        attempt = self.attempts().get()
+        self.assertRedirects(
+            response, reverse("random_test_result", args=[attempt.id])
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.attempt_id, attempt.id)
+
+        response = self.submit()
+        self.assertRedirects(
+            response, reverse("subject_tests", args=[self.subject.id])
+        )
+        self.assertEqual(self.attempts().count(), 1)
+
+    def test_questions_outside_session_are_ignored(self):
+        outsider = catalog.test(self.second.id).questions[0]
+        self.assertNotIn(outsider.id, self.question_ids)
+        self.submit({f"question_{outsider.id}": outsider.correct_answer_id})
+        attempt = self.attempts().get()
+        self.assertEqual(attempt.total_questions, len(self.question_ids))
+        self.assertEqual(attempt.score, len(self.question_ids))
+        self.assertEqual(
+            [question_id for question_id, _selected, _ok in attempt.answer_records()],
+            self.question_ids,
+        )
+
+    @override_settings(RANDOM_TEST_SESSION_MAX_AGE=60)
+    def test_expired_session_is_refused(self):
+        RandomTestSession.objects.filter(id=self.session.id).update(
+            created_at=timezone.now() - timedelta(minutes=2)
+        )
+        response = self.submit()
+        self.assertRedirects(
+            response, reverse("subject_tests", args=[self.subject.id])
+        )
+        self.assertFalse(self.attempts().exists())
+
+
+class SamplingTests(SimpleTestCase):
+    """``sample_questions`` - urug'li ``rng`` bilan takrorlanadigan tanlov"""
+
+    def setUp(self):
+        # Hajmlari 10, 20 va 30 bo'lgan uchta test
+        self.tests = []
+        questions = {}
+        next_id = 1
+        for test_id, size in enumerate((10, 20, 30), start=1):
+            test_questions = []
+            for question_id in range(next_id, next_id + size):
+                question = SimpleNamespace(id=question_id, test_id=test_id)
+                questions[question_id] = question
+                test_questions.append(question)
+            next_id += size
+            self.tests.append(SimpleNamespace(id=test_id, questions=test_questions))
+        self.snapshot = SubjectSnapshot(1, None, self.tests, questions, {})
+
+    def sample(self, count, stratify=False, seed=7):
+        return sample_questions(
+            self.snapshot, self.tests, count, stratify, rng=random.Random(seed)
+        )
+
+    def test_exact_count_without_duplicates(self):
+        for stratify in (False, True):
+            for count in (1, 5, 13, 59, 60):
+                with self.subTest(stratify=stratify, count=count):
+                    ids = [question.id for question in self.sample(count, stratify)]
+                    self.assertEqual(len(ids), count)
+                    self.assertEqual(len(set(ids)), count)
+
+    def test_same_seed_same_questions(self):
+        for stratify in (False, True):
+            with self.subTest(stratify=stratify):
+                self.assertEqual(
+                    self.sample(12, stratify), self.sample(12, stratify)
+                )
+                self.assertNotEqual(
+                    self.sample(12, stratify), self.sample(12, stratify, seed=8)
+                )
+
+    def test_stratified_split_is_proportional(self):
+        picked = Counter(question.test_id for question in self.sample(12, True))
+        self.assertEqual(picked, {1: 2, 2: 4, 3: 6})
+        # Qoldiqlar eng katta kasr qismiga beriladi: 1.67, 3.33, 5.0 -> 2, 3, 5
+        self.assertEqual(_allocate([10, 20, 30], 10), [2, 3, 5])
+        self.assertEqual(_allocate([1, 1, 1], 2), [1, 1, 0])
+
+    def test_count_larger_than_pool(self):
+        for stratify in (False, True):
+            with self.subTest(stratify=stratify):
+                ids = [question.id for question in self.sample(100, stratify)]
+                self.assertEqual(sorted(ids), list(range(1, 61)))
+        self.assertEqual(self.sample(0), [])
+
+
+def reload_urlconf():
+    """``test_app.urls`` ko'rinishlarni import paytida tanlaydi"""
+    from online_test_system import urls as project_urls
+    from test_app import urls as app_urls
+
+    importlib.reload(app_urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
+class AsyncExamViewTests(ExamTestCase):
+    """``ASYNC_EXAM_VIEWS`` - async ko'rinishlar sync bilan bir xil natija beradi"""
+
+    content = {"subjects": 1, "tests": 2, "questions": 6}
+
+    def setUp(self):
+        super().setUp()
+        [self.subject] = self.subjects
+        self.test = self.subject.tests.order_by("order").first()
+        self.addCleanup(reload_urlconf)
+
+    def use_views(self, asynchronous):
+        settings_override = override_settings(ASYNC_EXAM_VIEWS=asynchronous)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reload_urlconf()
+        if not asynchronous:
+            return self.client, lambda call: call
+        return self.async_client, async_to_sync
+
+    def login(self, client, username):
+        user = User.objects.create_user(username, password="x")
+        UserProfile.objects.create(user=user, first_name="A", last_name="B")
+        client.force_login(user)
+        return user
+
+    def exam_flow(self, asynchronous):
+        client, run = self.use_views(asynchronous)
+        module = "test_app.async_views" if asynchronous else "test_app.views"
+        user = self.login(client, f"imtihon_{int(asynchronous)}")
+
+        page = run(client.get)(reverse("take_test", args=[self.test.id]))
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(page.resolver_match.func.__module__, module)
+        questions = page.context["questions"]
+        # Ikkitasi to'g'ri, bittasi noto'g'ri, qolganlari javobsiz
+        data = {
+            f"question_{question.id}": question.correct_answer_id
+            for question in questions[:2]
+        }
+        data[f"question_{questions[2].id}"] = questions[2].answers[1].id
+        response = run(client.post)(
+            reverse("submit_test", args=[self.test.id]), data
+        )
+        attempt = UserTestAttempt.objects.get(user=user, is_random=False)
+        self.assertRedirects(
+            response,
+            reverse("test_result", args=[attempt.id]),
+            fetch_redirect_response=False,
+        )
+        result = run(client.get)(reverse("test_result", args=[attempt.id]))
+        self.assertEqual(result.status_code, 200)
+        rows = [
+            (
+                row["question"].id,
+                row["selected_answer"] and row["selected_answer"].id,
+                row["correct_answer"].id,
+            )
+            for row in result.context["results"]
+        ]
+
+        page = run(client.get)(reverse("take_random_test", args=[self.subject.id]))
+        self.assertEqual(page.resolver_match.func.__module__, module)
+        session = page.context["session"]
+        data = {"session": session.id}
+        for question in page.context["questions"]:
+            data[f"question_{question.id}"] = question.correct_answer_id
+        run(client.post)(reverse("submit_random_test", args=[self.subject.id]), data)
+        random_attempt = UserTestAttempt.objects.get(user=user, is_random=True)
+        random_result = run(client.get)(
+            reverse("random_test_result", args=[random_attempt.id])
+        )
+        self.assertEqual(random_result.status_code, 200)
+        return (
+            (attempt.score, attempt.total_questions),
+            rows,
+            (random_attempt.score, random_attempt.total_questions),
+            len(random_result.context["results"]),
+        )
+
+    def test_same_results_as_sync_views(self):
+        expected = self.exam_flow(asynchronous=False)
+        self.assertEqual(expected[0], (2, 6))
+        self.assertEqual(self.exam_flow(asynchronous=True), expected)
+
+    def test_login_required(self):
+        client, run = self.use_views(True)
+        login = reverse("login")
+        for url in (
+            reverse("take_test", args=[self.test.id]),
+            reverse("submit_test", args=[self.test.id]),
+            reverse("take_random_test", args=[self.subject.id]),
+            reverse("test_result", args=[1]),
+        ):
+            with self.subTest(url=url):
+                response = run(client.get)(url)
+                self.assertRedirects(
+                    response, f"{login}?next={url}", fetch_redirect_response=False
+                )
+
+
+class PackedAnswersTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 4}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.test = subject.tests.get()
+        self.questions = catalog.test(self.test.id).questions
+        self.user = User.objects.create_user("packed", password="x")
+        # 1-savol to'g'ri, 2-savol noto'g'ri, qolganlari javobsiz
+        first, second = self.questions[:2]
+        self.data = {
+            f"question_{first.id}": first.answers[0].id,
+            f"question_{second.id}": second.answers[1].id,
+        }
+        self.expected = [
+            (first.id, first.answers[0].id, True),
+            (second.id, second.answers[1].id, False),
+        ]
+
+    def test_packed_records(self):
+        attempt = grade_submission(self.user, self.questions, self.data, test=self.test)
+        attempt.refresh_from_db()
+        self.assertEqual(len(attempt.answers_packed), 5 * len(self.questions))
+        self.assertFalse(attempt.user_answers.exists())
+        self.assertEqual(
+            attempt.answer_records(),
+            self.expected
+            + [(question.id, None, False) for question in self.questions[2:]],
+        )
+
+    def test_pack_command(self):
+        with override_settings(ATTEMPT_ANSWER_STORAGE="rows"):
+            attempt = grade_submission(
+                self.user, self.questions, self.data, test=self.test
+            )
+        self.assertIsNone(attempt.answers_packed)
+        self.assertEqual(attempt.answer_records(), self.expected)
+
+        call_command("pack_attempt_answers", stdout=StringIO())
+        attempt.refresh_from_db()
+        self.assertFalse(attempt.user_answers.exists())
+        self.assertEqual(attempt.answer_records(), self.expected)
+
+
+class UserStatsTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 3}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.test = subject.tests.get()
+        self.questions = catalog.test(self.test.id).questions
+        self.user = User.objects.create_user("statistik", password="x")
+
+    def grade(self, answers):
+        return grade_submission(self.user, self.questions, answers, test=self.test)
+
+    def assertMatchesRebuild(self):
+        stats = UserStats.objects.get(user=self.user)
+        recorded = (
+            stats.total_attempts,
+            stats.passed_attempts,
+            stats.percentage_sum,
+            stats.by_subject,
+        )
+        rebuilt = UserStats.rebuild(self.user)
+        self.assertEqual(
+            recorded,
+            (
+                rebuilt.total_attempts,
+                rebuilt.passed_attempts,
+                rebuilt.percentage_sum,
+                rebuilt.by_subject,
+            ),
+        )
+        return stats
+
+    def test_first_row_counts_earlier_history(self):
+        self.grade(correct_answers(self.test))
+        # Statistika qatori hali yo'q - masalan, 0009 dan oldingi tarix
+        UserStats.objects.filter(user=self.user).delete()
+
+        self.grade({})
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats.total_attempts, stats.passed_attempts), (2, 1))
+
+        self.grade(correct_answers(self.test))
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats.total_attempts, stats.passed_attempts), (3, 2))
+
+
+class GenerateExamDataTests(ExamTestCase):
+    """``generate_exam_data`` - seed bo'yicha takrorlanuvchi, hosila jadvallar mos"""
+
+    options = {"subjects": 2, "tests": 2, "questions": 3, "users": 4, "attempts": 5}
+
+    def generate(self, prefix, seed=7):
+        call_command(
+            "generate_exam_data",
+            seed=seed,
+            prefix=prefix,
+            user_batch=3,
+            stdout=StringIO(),
+            **self.options,
+        )
+        return User.objects.filter(username__startswith=f"{prefix}_")
+
+    def signature(self, users):
+        """Id lardan mustaqil tavsif: kontent va har bir topshiruv"""
+        attempts = (
+            UserTestAttempt.objects.filter(user__in=users)
+            .select_related("user", "test")
+            .order_by("id")
+        )
+        subject_ids = sorted({attempt.subject_id for attempt in attempts})
+        tests = Test.objects.filter(subject_id__in=subject_ids).order_by("id")
+        return (
+            [
+                (
+                    test.order,
+                    test.min_score_to_unlock,
+                    list(
+                        Answer.objects.filter(question__test=test, is_correct=True)
+                        .order_by("question__order")
+                        .values_list("order", flat=True)
+                    ),
+                )
+                for test in tests
+            ],
+            [
+                (
+                    attempt.user.username.split("_", 1)[1],
+                    subject_ids.index(attempt.subject_id),
+                    attempt.test.order,
+                    attempt.score,
+                    attempt.completed_at,
+                    [is_correct for _q, _s, is_correct in attempt.answer_records()],
+                )
+                for attempt in attempts
+            ],
+        )
+
+    def test_row_counts(self):
+        models = (Subject, Test, Question, Answer, UserTestAttempt, UserStats)
+        before = [model.objects.count() for model in models]
+        users = self.generate("gen")
+        self.assertEqual(users.count(), 4)
+        self.assertEqual(UserProfile.objects.filter(user__in=users).count(), 4)
+        self.assertEqual(
+            [model.objects.count() - count for model, count in zip(models, before)],
+            [2, 4, 12, 48, 20, 4],
+        )
+
+    def test_same_seed_same_data(self):
+        first = self.signature(self.generate("birinchi"))
+        self.assertEqual(self.signature(self.generate("ikkinchi")), first)
+        self.assertNotEqual(self.signature(self.generate("boshqa", seed=8)), first)
+
+    def test_derived_tables_match_history(self):
+        users = self.generate("gen")
+        for user in users:
+            with self.subTest(user=user.username):
+                stats = UserStats.objects.get(user=user)
+                rebuilt = UserStats.rebuild(user)
+                self.assertEqual(
+                    (stats.total_attempts, stats.passed_attempts),
+                    (rebuilt.total_attempts, rebuilt.passed_attempts),
+                )
+                self.assertAlmostEqual(stats.percentage_sum, rebuilt.percentage_sum)
+                self.assertEqual(stats.by_subject.keys(), rebuilt.by_subject.keys())
+                for key, (total, passed, percentage_sum) in rebuilt.by_subject.items():
+                    self.assertEqual(stats.by_subject[key][:2], [total, passed])
+                    self.assertAlmostEqual(stats.by_subject[key][2], percentage_sum)
+
+                # Progress: oxirgi topshiruv, eng yaxshi foiz, oxirgisi o'tganmi
+                expected = {}
+                attempts = UserTestAttempt.objects.filter(user=user).select_related(
+                    "test"
+                )
+                for attempt in attempts.order_by("id"):
+                    best = expected.get(attempt.test_id, (None, 0, 0, 0, False))[3]
+                    expected[attempt.test_id] = (
+                        attempt.id,
+                        attempt.score,
+                        attempt.total_questions,
+                        max(best, attempt.score_percentage),
+                        attempt.is_passed,
+                    )
+                self.assertEqual(
+                    {
+                        row.test_id: (
+                            row.last_attempt_id,
+                            row.last_score,
+                            row.last_total,
+                            row.best_percentage,
+                            row.passed,
+                        )
+                        for row in UserTestProgress.objects.filter(user=user)
+                    },
+                    expected,
+                )
+
+
+class RetakeTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 3}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.test = subject.tests.get()
+        self.user = User.objects.create_user("retaker", password="x")
+        UserProfile.objects.create(user=self.user, first_name="A", last_name="B")
+        self.client.force_login(self.user)
+        self.failed = grade_submission(
+            self.user, catalog.test(self.test.id).questions, {}, test=self.test
+        )
+
+    def test_retake_archives_attempts(self):
+        response = self.client.post(reverse("retake_test", args=[self.test.id]))
+        self.assertRedirects(response, reverse("take_test", args=[self.test.id]))
+
+        self.failed.refresh_from_db()
+        self.assertIsNotNone(self.failed.archived_at)
+        self.assertIsNone(UserTestAttempt.current_for(self.user, self.test.id).first())
+        page = self.client.get(reverse("take_test", args=[self.test.id]))
+        self.assertFalse(page.context["has_previous"])
+        # Statistika tarixni hisoblaydi - qayta topshirish uni kamaytirmaydi
+        self.assertEqual(UserStats.for_user(self.user).total_attempts, 1)
+
+    def test_question_edit_refreshes_cached_fragment(self):
+        self.client.get(reverse("take_test", args=[self.test.id]))
+        question = self.test.questions.order_by("order").first()
+        question.question_text = "Yangilangan savol matni"
+        question.save()
+        page = self.client.get(reverse("take_test", args=[self.test.id]))
+        self.assertContains(page, "Yangilangan savol matni")
+
+    def test_purge_archived_attempts(self):
+        UserTestAttempt.archive_for(self.user, self.test)
+        call_command("purge_archived_attempts", days=1, stdout=StringIO())
+        self.assertTrue(UserTestAttempt.objects.filter(id=self.failed.id).exists())
+
+        self.assertEqual(UserStats.for_user(self.user).total_attempts, 1)
+
+        call_command("purge_archived_attempts", days=0, stdout=StringIO())
+        self.assertFalse(UserTestAttempt.objects.filter(id=self.failed.id).exists())
+        self.assertFalse(AttemptResult.objects.filter(attempt_id=self.failed.id).exists())
+        # O'chirilgan tarix statistikadan ham chiqadi
+        self.assertEqual(UserStats.for_user(self.user).total_attempts, 0)
+
+    def test_retake_is_atomic(self):
+        with mock.patch.object(UserTestProgress, "reset", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse("retake_test", args=[self.test.id]))
+        self.failed.refresh_from_db()
+        self.assertIsNone(self.failed.archived_at)
+
+
+class ImageVariantsTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Migratsiya yaratgan fanlarning fayllari vaqtinchalik MEDIA_ROOT da yo'q
+        Subject.objects.all().delete()
+
+    def upload(self, size=(600, 343)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (200, 60, 20)).save(buffer, "JPEG")
+        return SimpleUploadedFile("fan.jpg", buffer.getvalue(), "image/jpeg")
+
+    def test_variants_on_save(self):
+        subject = Subject.objects.create(name="Rasmli", image=self.upload())
+        variants = subject.image_variants
+        self.assertEqual(variants["source"], subject.image.name)
+        self.assertEqual(
+            [(item["width"], item["height"]) for item in variants["webp"]],
+            [(320, 183), (480, 274)],
+        )
+        for item in variants["webp"] + variants["jpeg"]:
+            with Image.open(os.path.join(settings.MEDIA_ROOT, item["name"])) as image:
+                self.assertEqual(image.size, (item["width"], item["height"]))
+
+        entry = catalog.subject(subject.id)
+        self.assertIn(" 480w", entry.image_webp_srcset)
+        self.assertEqual(
+            entry.image_thumbnail_url, "/media/" + variants["jpeg"][0]["name"]
+        )
+        self.client.force_login(User.objects.create_user("rasm", password="x"))
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, 'type="image/webp"')
+
+        # Rasm almashsa eski nusxalar o'chiriladi
+        old = variants["jpeg"][0]["name"]
+        subject.image = self.upload(size=(200, 100))
+        subject.save()
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, old)))
+        self.assertEqual(subject.image_variants["jpeg"][0]["width"], 200)
+
+    def test_backfill_command(self):
+        subject = Subject.objects.create(name="Eski", image=self.upload())
+        Subject.objects.filter(id=subject.id).update(image_variants={})
+        Subject.objects.create(name="Rasmsiz")
+
+        call_command("build_image_variants", stdout=StringIO())
+        subject.refresh_from_db()
+        self.assertEqual(len(subject.image_variants["jpeg"]), 2)
+        self.assertEqual(Subject.objects.get(name="Rasmsiz").image_variants, {})
+
+    def test_content_addressed_storage(self):
+        first = Subject.objects.create(name="Birinchi", image=self.upload())
+        second = Subject.objects.create(name="Ikkinchi", image=self.upload())
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+        subjects_dir = os.path.join(settings.MEDIA_ROOT, "subjects")
+        # Asl rasm va variants/ katalogi
+        self.assertEqual(len(os.listdir(subjects_dir)), 2)
+
+        # Ikkinchi fan rasmni almashtiradi - umumiy nusxalar o'chirilmaydi
+        second.image = self.upload(size=(200, 100))
+        second.save()
+        for name in [first.image.name, *variant_names(first.image_variants)]:
+            self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, name)))
+
+        first.delete()
+        call_command("purge_unused_media", grace_minutes=0, stdout=StringIO())
+        self.assertFalse(
+            os.path.exists(os.path.join(settings.MEDIA_ROOT, first.image.name))
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(settings.MEDIA_ROOT, second.image.name))
+        )
+
+
+@override_settings(DB_LOCK_RETRIES=2, DB_LOCK_RETRY_BACKOFF=0.01)
+class RetryOnLockTests(SimpleTestCase):
+    """``retry_on_lock`` - "database is locked" da qayta urinish va hisoblagichlar"""
+
+    def setUp(self):
+        dblocks.reset()
+        self.addCleanup(dblocks.reset)
+        sleep = mock.patch("test_app.dblocks.time.sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def flaky(self, *errors):
+        """Avval ``errors`` ni ko'taradi, keyin "ok" qaytaradi"""
+        calls = mock.Mock(side_effect=[*errors, "ok"], __name__="grade")
+        return calls, dblocks.retry_on_lock(calls)
+
+    def counters(self):
+        data = dblocks.snapshot()
+        return data["retries"], data["failures"]
+
+    def test_retries_until_success(self):
+        calls, func = self.flaky(
+            OperationalError("database is locked"),
+            OperationalError("database is locked"),
+        )
+        with self.assertLogs("test_app.dblocks", "WARNING") as logs:
+            self.assertEqual(func(1, key="x"), "ok")
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(calls.call_count, 3)
+        calls.assert_called_with(1, key="x")
+        self.assertEqual(self.counters(), (2, 0))
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_gives_up_after_limit(self):
+        calls, func = self.flaky(*[OperationalError("database is locked")] * 3)
+        with self.assertLogs("test_app.dblocks", "ERROR"):
+            with self.assertRaisesMessage(OperationalError, "locked"):
+                func()
+        self.assertEqual(calls.call_count, 3)
+        self.assertEqual(self.counters(), (2, 1))
+
+    def test_other_errors_are_not_retried(self):
+        calls, func = self.flaky(OperationalError("no such table: x"))
+        with self.assertRaisesMessage(OperationalError, "no such table"):
+            func()
+        self.assertEqual(calls.call_count, 1)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_no_retry_inside_outer_atomic(self):
+        calls, func = self.flaky(OperationalError("database is locked"))
+        with mock.patch.object(connection, "in_atomic_block", True):
+            with self.assertRaises(OperationalError):
+                func()
+        self.assertEqual(calls.call_count, 1)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_lock_errors_are_counted(self):
+        execute = mock.Mock(side_effect=OperationalError("database is locked"))
+        with self.assertRaises(OperationalError):
+            dblocks._lock_wrapper(execute, "UPDATE x", (), False, {})
+        self.assertEqual(dblocks.snapshot()["lock_errors"], 1)
+
+
+class FileServingTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        self.content = bytes(range(256)) * 4
+        with open(os.path.join(self.root, "rasm.jpg"), "wb") as file:
+            file.write(self.content)
+        self.factory = RequestFactory()
+
+    def get(self, path="rasm.jpg", **headers):
+        request = self.factory.get("/media/" + path, headers=headers)
+        return serve(request, path, document_root=self.root, cache_max_age=60)
+
+    def test_full_and_conditional(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+
+        self.assertEqual(self.get(If_None_Match=response["ETag"]).status_code, 304)
+        not_modified = self.get(If_Modified_Since=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_range(self):
+        response = self.get(Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        suffix = self.get(Range="bytes=-4")
+        self.assertEqual(b"".join(suffix.streaming_content), self.content[-4:])
+        self.assertEqual(self.get(Range="bytes=2000-").status_code, 416)
+        # Eskirgan If-Range - butun fayl
+        stale = self.get(Range="bytes=0-1", If_Range='"eski"')
+        self.assertEqual(stale.status_code, 200)
+        stale.close()
+
+    def test_offload_and_missing(self):
+        with override_settings(FILE_OFFLOAD="x-accel-redirect"):
+            response = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], "/internal/rasm.jpg")
+        self.assertEqual(response.content, b"")
+        with override_settings(FILE_OFFLOAD="x-sendfile"):
+            response = self.get()
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.root, "rasm.jpg"))
+
+        for path in ("yoq.jpg", "../rasm.jpg", ""):
+            with self.assertRaises(Http404):
+                self.get(path)
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(STATIC_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.url = static("css/styles.css")
+        with open(os.path.join(root.name, self.url[len("/static/") :]), "rb") as file:
+            self.content = file.read()
+
+    def test_precompressed_variant(self):
+        self.assertRegex(self.url, r"^/static/css/styles\.[0-9a-f]{12}\.css$")
+        response = self.client.get(
+            self.url, headers={"accept-encoding": "gzip, br;q=0"}
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", response["Cache-Control"])
+        body = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), self.content)
+
+        preferred = self.client.get(self.url, headers={"accept-encoding": "gzip, br"})
+        self.assertEqual(preferred["Content-Encoding"], "br")
+        preferred.close()
+
+        plain = self.client.get(self.url, headers={"accept-encoding": "identity"})
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(plain.streaming_content), self.content)
+        # Xeshsiz nom keshlanmaydi, faqat shartli GET
+        unhashed = self.client.get("/static/css/styles.css")
+        self.assertFalse(unhashed.has_header("Cache-Control"))
+        unhashed.close()
+
+    @mock.patch.object(storage, "brotli", None)
+    def test_missing_brotli_is_reported(self):
+        with self.assertLogs("test_app.storage", "WARNING"):
+            call_command("collectstatic", interactive=False, verbosity=0)
+
+
+class ApiTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 2, "questions": 2}
+
+    def setUp(self):
+        super().setUp()
+        [subject] = self.subjects
+        self.first, self.second = subject.tests.order_by("order")
+        self.user = User.objects.create_user("api_user", password="x")
+
+    def test_requires_login(self):
+        for url in (
+            reverse("api_subjects"),
+            reverse("api_test", args=[self.first.id]),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 302, url)
+
+    def test_locked_test_is_forbidden(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("api_test", args=[self.second.id]))
+        self.assertEqual(response.status_code, 403)
+
+        grade_submission(
+            self.user,
+            catalog.test(self.first.id).questions,
+            correct_answers(self.first),
+            test=self.first,
+        )
+        response = self.client.get(reverse("api_test", args=[self.second.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_responses_are_private(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("api_test", args=[self.first.id]))
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("public", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+        response = self.client.get(
+            reverse("api_test", args=[self.first.id]),
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class UnlockTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 2}
+
+    def setUp(self):
+        super().setUp()
+        [self.subject] = self.subjects
+        self.first = self.subject.tests.get()
+        self.user = User.objects.create_user("ochuvchi", password="x")
+        grade_submission(
+            self.user,
+            catalog.test(self.first.id).questions,
+            correct_answers(self.first),
+            test=self.first,
+        )
+
+    def unlocked_ids(self):
+        entry = catalog.subject(self.subject.id)
+        return [test.id for test in entry.unlocked_tests_for_user(self.user)]
+
+    def test_test_added_after_passing_is_unlocked(self):
+        second = Test.objects.create(subject=self.subject, order=2, name="Test 2")
+        self.assertTrue(catalog.test(second.id).is_unlocked_for_user(self.user))
+        self.assertTrue(second.is_unlocked_for_user(self.user))
+        self.assertIn(second.id, self.unlocked_ids())
+
+        # Chegara ko'tarilsa keyingi test yana yopiladi
+        self.first.min_score_to_unlock = 101
+        self.first.save()
+        self.assertFalse(catalog.test(second.id).is_unlocked_for_user(self.user))
+        self.assertFalse(second.is_unlocked_for_user(self.user))
+        self.assertNotIn(second.id, self.unlocked_ids())
+        states = {
+            test.id: unlocked
+            for test, _row, unlocked in self.subject.test_states_for_user(self.user)
+        }
+        self.assertEqual(states, {self.first.id: True, second.id: False})
+
+    def assertUnlocked(self, test, expected):
+        self.assertIs(catalog.test(test.id).is_unlocked_for_user(self.user), expected)
+        self.assertIs(test.is_unlocked_for_user(self.user), expected)
+        self.assertIs(test.id in self.unlocked_ids(), expected)
+        states = {
+            test.id: unlocked
+            for test, _row, unlocked in self.subject.test_states_for_user(self.user)
+        }
+        self.assertIs(states[test.id], expected)
+
+    def test_last_attempt_decides(self):
+        # Asl qoida: eng yaxshi emas, oxirgi natija chegaradan o'tgan bo'lishi kerak
+        second = Test.objects.create(subject=self.subject, order=2, name="Test 2")
+        self.assertUnlocked(second, True)
+        grade_submission(
+            self.user, catalog.test(self.first.id).questions, {}, test=self.first
+        )
+        self.assertUnlocked(second, False)
+        grade_submission(
+            self.user,
+            catalog.test(self.first.id).questions,
+            correct_answers(self.first),
+            test=self.first,
+        )
+        self.assertUnlocked(second, True)
+
+    def test_threshold_compared_exactly(self):
+        # 1/2 = 50%: float xatosisiz, chegarada ochiq
+        second = Test.objects.create(subject=self.subject, order=2, name="Test 2")
+        questions = catalog.test(self.first.id).questions
+        grade_submission(
+            self.user,
+            questions,
+            {f"question_{questions[0].id}": questions[0].correct_answer_id},
+            test=self.first,
+        )
+        for threshold, expected in ((50, True), (51, False)):
+            with self.subTest(threshold=threshold):
+                self.first.min_score_to_unlock = threshold
+                self.first.save()
+                self.assertUnlocked(second, expected)
+
+
+class LeaderboardRankTests(ExamTestCase):
+    content = {"subjects": 1, "tests": 1, "questions": 1}
+
+    def setUp(self):
+        super().setUp()
+        [self.subject] = self.subjects
+        self.test = self.subject.tests.get()
+        now = timezone.now()
+        # (natija, necha daqiqa oldin): teng natijada oldinroq erishgan yuqorida
+        results = [(90, 5), (80, 10), (80, 20), (80, 1), (50, 30)]
+        self.users = create_users(len(results), prefix="reyting_")
+        for test in (self.test, None):
+            LeaderboardEntry.objects.bulk_create(
+                LeaderboardEntry(
+                    subject=self.subject,
+                    test=test,
+                    user=user,
+                    best_percentage=percentage,
+                    achieved_at=now - timedelta(minutes=minutes),
+                )
+                for user, (percentage, minutes) in zip(self.users, results)
+            )
+
+    def test_rank_for(self):
+        for test_id in (self.test.id, None):
+            with self.subTest(test_id=test_id):
+                ranks = []
+                for user in self.users:
+                    with self.assertNumQueries(1):
+                        rank, entry = LeaderboardEntry.rank_for(
+                            user, self.subject.id, test_id
+                        )
+                    self.assertEqual(entry.user_id, user.id)
+                    ranks.append(rank)
+                self.assertEqual(ranks, [1, 3, 2, 4, 5])
+        outsider = User.objects.create_user("reytingsiz", password="x")
+        self.assertEqual(
+            LeaderboardEntry.rank_for(outsider, self.subject.id), (None, None)
+        )
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN - SQLite")
+    def test_rank_counts_use_covering_index(self):
+        for test_id in (self.test.id, None):
+            with self.subTest(test_id=test_id):
+                with CaptureQueriesContext(connection) as captured:
+                    LeaderboardEntry.rank_for(self.users[2], self.subject.id, test_id)
+                with connection.cursor() as cursor:
+                    cursor.execute("EXPLAIN QUERY PLAN " + captured[0]["sql"])
+                    plan = [row[-1] for row in cursor.fetchall()]
+                counts = [line for line in plan if "leaderboard_rank_idx" in line]
+                self.assertEqual(len(counts), 2, plan)
+                for line in counts:
+                    self.assertIn("COVERING INDEX", line)
+                self.assertFalse([line for line in plan if line.startswith("SCAN")])
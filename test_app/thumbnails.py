@@ -0,0 +1,109 @@
+"""Fan rasmlari uchun kichraytirilgan nusxalar (derivativlar).
+
+Admin yuklagan asl rasm (odatda 600px, 100 KB atrofida JPEG) kartochkada
+300-400px kenglikda ko'rsatiladi. Saqlashda ``WIDTHS`` kengliklari bo'yicha
+WebP va JPEG nusxalar yaratiladi va o'lchamlari ``Subject.image_variants``
+ga yoziladi::
+
+    {
+        "source": "subjects/1.jpg",
+        "webp": [{"name": "subjects/variants/...", "width": 320, "height": 183}, ...],
+        "jpeg": [...],
+    }
+
+Shablonlar ``srcset`` ni ``CatalogSubject.image_srcset`` /
+``image_webp_srcset`` dan oladi. Nusxa yo'q bo'lsa asl rasm ishlatiladi.
+"""
+
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Kartochka kengligi 300-400px; 640 - ikki barobar zichlikdagi ekranlar uchun
+WIDTHS = (320, 480, 640)
+# (kalit, Pillow formati, kengaytma, saqlash parametrlari)
+FORMATS = (
+    ("webp", "WEBP", "webp", {"quality": 75, "method": 6}),
+    ("jpeg", "JPEG", "jpg", {"quality": 80, "optimize": True, "progressive": True}),
+)
+VARIANTS_DIR = "variants"
+
+
+def _target_widths(width):
+    """Asl rasmdan katta qilib kattalashtirilmaydi"""
+    widths = [target for target in WIDTHS if target < width]
+    return widths or [width]
+
+
+def _flatten(image):
+    """JPEG shaffoflikni qo'llamaydi - oq fon ustiga"""
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def build_variants(name, storage=default_storage):
+    """``name`` rasmidan nusxalar yaratadi; ``image_variants`` qiymatini qaytaradi.
+
+    Rasm bo'sh bo'lsa ``{}``; topilmasa yoki o'qib bo'lmasa faqat ``source`` -
+    keyingi saqlashlarda qayta urinilmaydi, shablon asl rasmni ko'rsatadi.
+    """
+    if not name:
+        return {}
+    try:
+        with storage.open(name, "rb") as source:
+            image = Image.open(source)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Rasm nusxalari yaratilmadi (%s): %s", name, exc)
+        return {"source": name}
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    flat = _flatten(image)
+
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    variants = {"source": name}
+    for key, pil_format, extension, params in FORMATS:
+        source_image = image if key == "webp" else flat
+        items = []
+        for width in _target_widths(image.width):
+            height = max(1, round(image.height * width / image.width))
+            resized = source_image.resize((width, height), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **params)
+            saved = storage.save(
+                os.path.join(directory, VARIANTS_DIR, f"{stem}-{width}.{extension}"),
+                ContentFile(buffer.getvalue()),
+            )
+            items.append({"name": saved, "width": width, "height": height})
+        variants[key] = items
+    return variants
+
+
+def variant_names(variants):
+    """``image_variants`` dagi barcha fayl nomlari"""
+    return [
+        item["name"]
+        for key, _format, _extension, _params in FORMATS
+        for item in (variants or {}).get(key, ())
+    ]
+
+
+def srcset(variants, key, storage=default_storage):
+    """``<img srcset>`` qiymati: ``url 320w, url 480w``"""
+    return ", ".join(
+        f"{storage.url(item['name'])} {item['width']}w"
+        for item in (variants or {}).get(key, ())
+    )
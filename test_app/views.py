@@ -1,23 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.utils import timezone
 from django.utils.translation import gettext as _
+from django.db import transaction
 from django.db.models import Q
-import random
 import json
 
 from .models import (
     Subject,
     Test,
-    Question,
-    Answer,
     UserProfile,
     UserTestAttempt,
-    UserAnswer,
+    UserTestProgress,
+    RandomTestSession,
+    AttemptResult,
+    UserStats,
+    LeaderboardEntry,
 )
+from .catalog import catalog
+from .dblocks import retry_on_lock
+from .grading import grade_submission
+from .results import build_payload, result_rows
+from .sampling import sample_questions
+
+PROFILE_HISTORY_PAGE_SIZE = 20
+LEADERBOARD_SIZE = 50
 
 
 def register_view(request):
@@ -86,39 +97,27 @@ def logout_view(request):
 
 @login_required
 def home_view(request):
-    subjects = Subject.objects.all()
+    subjects = catalog.subjects()
     return render(request, "home.html", {"subjects": subjects})
 
 
 @login_required
 def subject_tests_view(request, subject_id):
     subject = get_object_or_404(Subject, id=subject_id)
-    tests = subject.tests.all().order_by("order")
 
     test_data = []
-    for test in tests:
-        last_attempt = (
-            UserTestAttempt.objects.filter(
-                user=request.user,
-                test=test,
-                completed=True,
-            )
-            .order_by("-completed_at")
-            .first()
-        )
-
-        is_unlocked = test.is_unlocked_for_user(request.user)
-
+    for test, progress, is_unlocked in subject.test_states_for_user(request.user):
+        attempted = progress is not None and progress.attempted
         test_data.append(
             {
                 "test": test,
                 "is_unlocked": is_unlocked,
-                "attempted": last_attempt is not None,
-                "score": last_attempt.score if last_attempt else 0,
-                "total": last_attempt.total_questions if last_attempt else 0,
-                "percentage": last_attempt.score_percentage if last_attempt else 0,
-                "passed": last_attempt.is_passed if last_attempt else False,
-                "can_retake": last_attempt.can_retake if last_attempt else False,
+                "attempted": attempted,
+                "score": progress.last_score if attempted else 0,
+                "total": progress.last_total if attempted else 0,
+                "percentage": progress.last_percentage if attempted else 0,
+                "passed": progress.passed if attempted else False,
+                "can_retake": progress.can_retake if attempted else False,
             }
         )
 
@@ -136,37 +135,55 @@ def subject_tests_view(request, subject_id):
     )
 
 
+@login_required
+def leaderboard_view(request, subject_id):
+    subject = catalog.subject(subject_id)
+    if subject is None:
+        raise Http404
+
+    # ?test=<id> - test reytingi, bo'lmasa random test reytingi
+    board_test = next(
+        (t for t in subject.tests if str(t.id) == request.GET.get("test")), None
+    )
+    test_id = board_test.id if board_test else None
+    my_rank, my_entry = LeaderboardEntry.rank_for(request.user, subject.id, test_id)
+
+    return render(
+        request,
+        "leaderboard.html",
+        {
+            "subject": subject,
+            "board_test": board_test,
+            "entries": LeaderboardEntry.top(subject.id, test_id, LEADERBOARD_SIZE),
+            "my_rank": my_rank,
+            "my_entry": my_entry,
+        },
+    )
+
+
 @login_required
 def take_test_view(request, test_id):
-    test = get_object_or_404(Test, id=test_id)
+    test = catalog.test(test_id)
+    if test is None:
+        raise Http404
 
     if not test.is_unlocked_for_user(request.user):
         messages.error(
             request,
             _("Bu test hali ochilmagan! Avval oldingi testdan o‘tishingiz kerak."),
         )
-        return redirect("subject_tests", subject_id=test.subject.id)
+        return redirect("subject_tests", subject_id=test.subject_id)
 
-    questions = test.questions.all().order_by("order").prefetch_related("answers")
-
-    last_attempt = (
-        UserTestAttempt.objects.filter(
-            user=request.user,
-            test=test,
-            completed=True,
-        )
-        .order_by("-completed_at")
-        .first()
-    )
+    last_attempt = UserTestAttempt.current_for(request.user, test.id).first()
 
     previous_answers = {}
     if last_attempt:
-        for user_answer in last_attempt.user_answers.all():
-            previous_answers[user_answer.question.id] = {
-                "selected": user_answer.selected_answer.id
-                if user_answer.selected_answer
-                else None,
-                "is_correct": user_answer.is_correct,
+        for question_id, selected_id, is_correct in last_attempt.answer_records():
+            if selected_id is None:
+                continue
+            previous_answers[question_id] = {
+                "selected": selected_id,
+                "is_correct": is_correct,
             }
 
     return render(
@@ -174,7 +191,8 @@ def take_test_view(request, test_id):
         "take_test.html",
         {
             "test": test,
-            "questions": questions,
+            "questions": test.questions,
+            "cache_timeout": settings.CATALOG_TTL,
             "previous_answers": json.dumps(previous_answers),
             "has_previous": last_attempt is not None,
             "min_score_to_unlock": test.min_score_to_unlock,
@@ -188,41 +206,16 @@ def submit_test_view(request, test_id):
         return redirect("home")
 
     test = get_object_or_404(Test, id=test_id)
-    questions = test.questions.all()
+    questions = catalog.test(test.id).questions
+
+    attempt = grade_submission(request.user, questions, request.POST, test=test)
+
+    _announce_test_result(request, test, attempt, test.next_test())
+
+    return redirect("test_result", attempt_id=attempt.id)
 
-    attempt = UserTestAttempt.objects.create(
-        user=request.user,
-        test=test,
-        total_questions=questions.count(),
-    )
 
-    correct_count = 0
-
-    for question in questions:
-        answer_id = request.POST.get(f"question_{question.id}")
-        if answer_id:
-            try:
-                selected_answer = Answer.objects.get(id=answer_id)
-                is_correct = selected_answer.is_correct
-
-                UserAnswer.objects.create(
-                    attempt=attempt,
-                    question=question,
-                    selected_answer=selected_answer,
-                    is_correct=is_correct,
-                )
-
-                if is_correct:
-                    correct_count += 1
-            except Answer.DoesNotExist:
-                pass
-
-    attempt.score = correct_count
-    attempt.completed = True
-    attempt.completed_at = timezone.now()
-    attempt.save()
-
-    next_test = test.next_test()
+def _announce_test_result(request, test, attempt, next_test):
     if attempt.is_passed and next_test:
         messages.success(
             request,
@@ -244,61 +237,77 @@ def submit_test_view(request, test_id):
             % {"test": test.name},
         )
 
-    return redirect("test_result", attempt_id=attempt.id)
-
 
 @login_required
 def test_result_view(request, attempt_id):
     attempt = get_object_or_404(
-        UserTestAttempt,
+        UserTestAttempt.objects.select_related("test__subject", "result"),
         id=attempt_id,
         user=request.user,
     )
 
-    user_answers = attempt.user_answers.all().select_related(
-        "question",
-        "selected_answer",
-    )
-
-    results = []
-    for user_answer in user_answers:
-        correct_answer = user_answer.question.answers.filter(is_correct=True).first()
-        results.append(
-            {
-                "question": user_answer.question,
-                "selected_answer": user_answer.selected_answer,
-                "correct_answer": correct_answer,
-                "is_correct": user_answer.is_correct,
-                "all_answers": user_answer.question.answers.all(),
-            }
-        )
-
     return render(
         request,
         "test_result.html",
         {
             "attempt": attempt,
-            "results": results,
+            "results": result_rows(_result_payload(attempt)),
             "min_score": attempt.test.min_score_to_unlock if attempt.test else 80,
         },
     )
 
 
+def _result_payload(attempt):
+    """Natija snapshoti; eski topshiruvlar uchun birinchi ochilishda yaratiladi"""
+    try:
+        return attempt.result.payload
+    except AttemptResult.DoesNotExist:
+        pass
+
+    questions = []
+    selected = {}
+    for question_id, selected_id, _is_correct in attempt.answer_records():
+        question = catalog.question(question_id)
+        if question is None:
+            continue
+        questions.append(question)
+        answer = next((a for a in question.answers if a.id == selected_id), None)
+        if answer is not None:
+            selected[question_id] = answer
+
+    result, _created = AttemptResult.objects.get_or_create(
+        attempt=attempt, defaults={"payload": build_payload(questions, selected)}
+    )
+    return result.payload
+
+
 @login_required
 def profile_view(request):
     profile = request.user.profile
-    attempts = UserTestAttempt.objects.filter(
-        user=request.user,
-        completed=True,
-    ).order_by("-completed_at")
-
-    total_attempts = attempts.count()
-    passed_attempts = sum(1 for a in attempts if a.is_passed)
-    average_score = (
-        sum(a.score_percentage for a in attempts) / total_attempts
-        if total_attempts > 0
-        else 0
+    stats = UserStats.for_user(request.user)
+
+    # Keyset pagination: ?before=<attempt_id> - sahifa narxi tarix hajmiga bog'liq emas
+    attempts = (
+        UserTestAttempt.objects.filter(user=request.user, completed=True)
+        .select_related("test__subject")
+        .order_by("-completed_at", "-id")
+    )
+    cursor = (
+        attempts.filter(id=request.GET["before"]).values("completed_at", "id").first()
+        if request.GET.get("before", "").isdigit()
+        else None
     )
+    if cursor:
+        attempts = attempts.filter(
+            Q(completed_at__lt=cursor["completed_at"])
+            | Q(completed_at=cursor["completed_at"], id__lt=cursor["id"])
+        )
+
+    attempts = list(attempts[: PROFILE_HISTORY_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(attempts) > PROFILE_HISTORY_PAGE_SIZE:
+        attempts = attempts[:PROFILE_HISTORY_PAGE_SIZE]
+        next_cursor = attempts[-1].id
 
     return render(
         request,
@@ -306,9 +315,12 @@ def profile_view(request):
         {
             "profile": profile,
             "attempts": attempts,
-            "total_attempts": total_attempts,
-            "passed_attempts": passed_attempts,
-            "average_score": average_score,
+            "next_cursor": next_cursor,
+            "is_first_page": cursor is None,
+            "subject_stats": stats.subject_rows(),
+            "total_attempts": stats.total_attempts,
+            "passed_attempts": stats.passed_attempts,
+            "average_score": stats.average_score,
         },
     )
 
@@ -318,21 +330,10 @@ def retake_test_view(request, test_id):
     test = get_object_or_404(Test, id=test_id)
 
     if request.method == "POST":
-        last_attempt = (
-            UserTestAttempt.objects.filter(
-                user=request.user,
-                test=test,
-                completed=True,
-            )
-            .order_by("-completed_at")
-            .first()
-        )
+        last_attempt = UserTestAttempt.current_for(request.user, test.id).first()
 
         if last_attempt and last_attempt.can_retake:
-            UserTestAttempt.objects.filter(
-                user=request.user,
-                test=test,
-            ).delete()
+            _reset_for_retake(request.user, test)
 
             messages.info(
                 request,
@@ -348,25 +349,44 @@ def retake_test_view(request, test_id):
     return redirect("subject_tests", subject_id=test.subject.id)
 
 
+@retry_on_lock
+def _reset_for_retake(user, test):
+    """Arxivlash va natijani tozalash birga - yarim qayta topshirish qolmaydi"""
+    with transaction.atomic():
+        # Eski topshiruvlar tarixda qoladi (statistika ham ularni hisoblaydi)
+        UserTestAttempt.archive_for(user, test)
+        UserTestProgress.reset(user, test)
+
+
 # ================= RANDOM TEST =================
 
 
 @login_required
 def take_random_test_view(request, subject_id):
-    subject = get_object_or_404(Subject, id=subject_id)
+    snapshot = catalog.snapshot(subject_id)
+    if snapshot is None:
+        raise Http404
+    subject = snapshot.subject
 
-    tests = subject.tests.all()
-    unlocked_tests = [t for t in tests if t.is_unlocked_for_user(request.user)]
+    unlocked_tests = subject.unlocked_tests_for_user(request.user)
 
     if not unlocked_tests:
         messages.error(request, _("Sizda hali ochilgan testlar mavjud emas!"))
         return redirect("subject_tests", subject_id=subject_id)
 
-    all_questions = []
-    for test in unlocked_tests:
-        all_questions.extend(list(test.questions.all()))
+    # Sahifa qayta ochilsa o'sha savollar beriladi (oldindan yaratilgan to'plam ham)
+    session = RandomTestSession.open_for(request.user, subject.id)
+    if session is not None:
+        random_questions = _session_questions(session)
+    else:
+        random_questions = sample_questions(
+            snapshot,
+            unlocked_tests,
+            subject.random_test_question_count,
+            stratify=subject.random_test_stratified,
+        )
 
-    question_count = min(subject.random_test_question_count, len(all_questions))
+    question_count = len(random_questions)
     if question_count < 5:
         messages.error(
             request,
@@ -374,25 +394,32 @@ def take_random_test_view(request, subject_id):
         )
         return redirect("subject_tests", subject_id=subject_id)
 
-    random_questions = random.sample(all_questions, question_count)
+    if session is None:
+        session = RandomTestSession(user=request.user, subject_id=subject.id)
+        session.set_question_ids(question.id for question in random_questions)
+        session.save()
+
+    return render(
+        request,
+        "take_random_test.html",
+        _random_test_context(subject, session, random_questions),
+    )
+
 
+def _random_test_context(subject, session, questions):
     random_test = {
         "id": 0,
         "name": f"{subject.name} - Random Test",
         "subject": subject,
         "is_random": True,
     }
-
-    return render(
-        request,
-        "take_random_test.html",
-        {
-            "test": random_test,
-            "questions": random_questions,
-            "subject": subject,
-            "question_count": question_count,
-        },
-    )
+    return {
+        "test": random_test,
+        "questions": questions,
+        "subject": subject,
+        "session": session,
+        "question_count": len(questions),
+    }
 
 
 @login_required
@@ -401,48 +428,53 @@ def submit_random_test_view(request, subject_id):
         return redirect("home")
 
     subject = get_object_or_404(Subject, id=subject_id)
-    question_ids = [int(i) for i in request.POST.getlist("question_ids[]") if i]
+    session = RandomTestSession.open_for(request.user, subject.id)
 
-    if not question_ids:
+    if session is None or str(session.id) != request.POST.get("session"):
         messages.error(request, _("Savollar topilmadi!"))
         return redirect("subject_tests", subject_id=subject_id)
 
-    attempt = UserTestAttempt.objects.create(
-        user=request.user,
-        test=None,
-        total_questions=len(question_ids),
-        is_random=True,
-    )
-
-    correct_count = 0
+    questions = _session_questions(session)
+    attempt = _grade_random_session(request.user, session, questions, request.POST)
+    if attempt is None:
+        messages.error(request, _("Savollar topilmadi!"))
+        return redirect("subject_tests", subject_id=subject_id)
 
-    for q_id in question_ids:
-        question = get_object_or_404(Question, id=q_id)
-        answer_id = request.POST.get(f"question_{q_id}")
+    _announce_random_result(request, subject, attempt)
 
-        if answer_id:
-            try:
-                selected_answer = Answer.objects.get(id=answer_id)
-                is_correct = selected_answer.is_correct
+    return redirect("random_test_result", attempt_id=attempt.id)
 
-                UserAnswer.objects.create(
-                    attempt=attempt,
-                    question=question,
-                    selected_answer=selected_answer,
-                    is_correct=is_correct,
-                )
 
-                if is_correct:
-                    correct_count += 1
-            except (Answer.DoesNotExist, ValueError):
-                pass
+def _session_questions(session):
+    """Sessiyadagi savollar (katalogdan; o'chirilganlari tashlanadi)"""
+    return [
+        question
+        for question in map(catalog.question, session.get_question_ids())
+        if question is not None
+    ]
+
+
+@retry_on_lock
+def _grade_random_session(user, session, questions, data):
+    """Sessiyani band qilib baholaydi; allaqachon topshirilgan bo'lsa None"""
+    with transaction.atomic():
+        if not session.mark_submitted():
+            return None
+
+        attempt = grade_submission(
+            user,
+            questions,
+            data,
+            is_random=True,
+            subject_id=session.subject_id,
+        )
+        session.attempt = attempt
+        session.save(update_fields=["attempt"])
+    return attempt
 
-    attempt.score = correct_count
-    attempt.completed = True
-    attempt.completed_at = timezone.now()
-    attempt.save()
 
-    percentage = (correct_count / len(question_ids)) * 100 if question_ids else 0
+def _announce_random_result(request, subject, attempt):
+    percentage = attempt.score_percentage
 
     if percentage >= subject.random_test_min_score:
         messages.success(
@@ -462,37 +494,17 @@ def submit_random_test_view(request, subject_id):
             },
         )
 
-    return redirect("random_test_result", attempt_id=attempt.id)
-
 
 @login_required
 def random_test_result_view(request, attempt_id):
     attempt = get_object_or_404(
-        UserTestAttempt,
+        UserTestAttempt.objects.select_related("result"),
         id=attempt_id,
         user=request.user,
         is_random=True,
     )
 
-    user_answers = attempt.user_answers.all().select_related(
-        "question",
-        "selected_answer",
-        "question__test",
-    )
-
-    results = []
-    for user_answer in user_answers:
-        correct_answer = user_answer.question.answers.filter(is_correct=True).first()
-        results.append(
-            {
-                "question": user_answer.question,
-                "selected_answer": user_answer.selected_answer,
-                "correct_answer": correct_answer,
-                "is_correct": user_answer.is_correct,
-                "all_answers": user_answer.question.answers.all(),
-                "test_name": user_answer.question.test.name,
-            }
-        )
+    results = result_rows(_result_payload(attempt))
 
     return render(
         request,